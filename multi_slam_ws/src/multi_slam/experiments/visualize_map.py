@@ -2,6 +2,7 @@
 # plot_map.py
 
 import matplotlib.pyplot as plt
+import shapely
 from shapely.geometry import Point, Polygon
 from typing import List, Optional
 from shapely.geometry import Polygon, Point, LineString
@@ -178,16 +179,17 @@ class Map:
         
         # Find closest intersection points
         point_cloud = []
-        robot_pos = Point(pos_true[0], pos_true[1])
         for ray in ray_segments:
             intersections = self.intersections(ray)
             if intersections:
-                # Find the closest intersection point
-                closest_point = min(intersections, key=lambda p: robot_pos.distance(p))
+                # Find the closest intersection point from all coordinates at once
+                coords = shapely.get_coordinates(intersections)
+                squared_distances = ((coords - [pos_true[0], pos_true[1]]) ** 2).sum(axis=1)
+                closest = squared_distances.argmin()
                 # Discard points outside the valid range
-                distance = robot_pos.distance(closest_point)
+                distance = math.sqrt(squared_distances[closest])
                 if r_min <= distance <= r_max:
-                    point_cloud.append(closest_point)
+                    point_cloud.append(Point(coords[closest]))
             else:
                 # No intersection, add the ray's endpoint
                 point_cloud.append(Point(ray.coords[-1]))
@@ -218,17 +220,16 @@ def plot_map(map_obj):
     plt.figure(figsize=(10, 10))
     
     # Plot boundary
-    x, y = map_obj.boundary.xy
+    x, y = shapely.get_coordinates(map_obj.boundary).T
     plt.plot(x, y, 'k-', label='Teleop Movement')
     
     # Plot beacons
-    beacon_x = [beacon.x for beacon in map_obj.beacons]
-    beacon_y = [beacon.y for beacon in map_obj.beacons]
+    beacon_x, beacon_y = shapely.get_coordinates(map_obj.beacons).T
     plt.plot(beacon_x, beacon_y, 'r^', markersize=10, label='Beacons')
     
     # Plot obstacles
     for obstacle in map_obj.obstacles:
-        x, y = obstacle.exterior.xy
+        x, y = shapely.get_coordinates(obstacle.exterior).T
         plt.fill(x, y, 'gray', alpha=0.5)
 
     # Add arrow starting from center
@@ -17,6 +17,7 @@ class ControllerNode(Node):
         
         # Publishers
         self.control_pub = self.create_publisher(Vector3, "control_signal", 10)
+        self.control_msg = Vector3()  # Reused for every published command
         
         # Subscribers
         self.pose_sub = self.create_subscription(
@@ -61,7 +62,7 @@ class ControllerNode(Node):
 
     def publish_control(self):
         """Publish velocity command to move upward."""
-        msg = Vector3()
+        msg = self.control_msg
         msg.x = float(self.control_input[0])
         msg.y = float(self.control_input[1])
         msg.z = 0.0
@@ -1,9 +1,65 @@
-from typing import List, Optional
+from functools import cached_property, lru_cache
+from typing import List, Optional, Tuple
+import shapely
+from shapely import STRtree
 from shapely.geometry import Polygon, Point, LineString
 from shapely.geometry.base import BaseGeometry
-import math
 import numpy as np
 
+from multi_slam._fast import HAS_NUMBA
+
+
+if HAS_NUMBA:
+    from multi_slam._fast import njit, prange
+
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _first_hits_kernel(px: float, py: float,
+                           dirs: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """JIT-compiled Map._first_hits; rays that hit nothing get t = 2."""
+        t_min = np.empty(dirs.shape[0], dtype=dirs.dtype)
+        for r in prange(dirs.shape[0]):
+            dx = dirs[r, 0]
+            dy = dirs[r, 1]
+            best = 2.0
+            for e in range(edges.shape[0]):
+                ex = edges[e, 2] - edges[e, 0]
+                ey = edges[e, 3] - edges[e, 1]
+                denom = dx * ey - dy * ex
+                if denom == 0.0:
+                    continue
+                ox = edges[e, 0] - px
+                oy = edges[e, 1] - py
+                t = (ox * ey - oy * ex) / denom
+                u = (ox * dy - oy * dx) / denom
+                if 0.0 <= t <= 1.0 and 0.0 <= u <= 1.0 and t < best:
+                    best = t
+            t_min[r] = best
+        return t_min
+
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _segments_hit_kernel(px: float, py: float,
+                             dirs: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """JIT-compiled Map._segments_hit; stops testing a ray at its first hit."""
+        hits = np.zeros(dirs.shape[0], dtype=np.bool_)
+        for r in prange(dirs.shape[0]):
+            dx = dirs[r, 0]
+            dy = dirs[r, 1]
+            for e in range(edges.shape[0]):
+                ex = edges[e, 2] - edges[e, 0]
+                ey = edges[e, 3] - edges[e, 1]
+                denom = dx * ey - dy * ex
+                if denom == 0.0:
+                    continue
+                ox = edges[e, 0] - px
+                oy = edges[e, 1] - py
+                t = (ox * ey - oy * ex) / denom
+                u = (ox * dy - oy * dx) / denom
+                if 0.0 <= t <= 1.0 and 0.0 <= u <= 1.0:
+                    hits[r] = True
+                    break
+        return hits
+
+
 class Map:
     """
     Represents a 2D map with a rectangular boundary, obstacles, and beacons.
@@ -12,6 +68,7 @@ class Map:
     the map's boundary/obstacles, as well as adding obstacles and beacons.
 
     Attributes:
+        boundary_coords (np.ndarray): The closed ring of boundary corners as a (5, 2) array.
         boundary (LineString): The boundary of the map as a rectangular polygon's edge.
         obstacles (List[BaseGeometry]): A list of geometric obstacles on the map.
         beacons (List[Point]): A list of beacon positions.
@@ -38,16 +95,81 @@ class Map:
             y_max (float): Maximum y-coordinate (top boundary).
             obstacles (Optional[List[BaseGeometry]]): An optional list of obstacles.
         """
-        # Create a rectangular polygon and then use its boundary (LineString)
-        self.boundary: LineString = Polygon([
+        # Corners of the rectangle, repeating the first to close the ring
+        self.boundary_coords: np.ndarray = np.array([
             (x_min, y_min),
             (x_max, y_min),
             (x_max, y_max),
-            (x_min, y_max)
-        ]).boundary
+            (x_min, y_max),
+            (x_min, y_min)
+        ], dtype=np.float64)
         self.obstacles: List[BaseGeometry] = [] if obstacles is None else obstacles
         self.beacons: List[Point] = [] if beacons is None else beacons
 
+        # The boundary's four sides as (x1, y1, x2, y2) segments
+        self._boundary_edges: np.ndarray = np.hstack(
+            [self.boundary_coords[:-1], self.boundary_coords[1:]]
+        )
+
+        # Prepare the static geometry so repeated intersects tests are indexed
+        for obstacle in self.obstacles:
+            shapely.prepare(obstacle)
+
+        # Derived views of the geometry, rebuilt lazily after obstacles/beacons change
+        self._edges_cache: Optional[np.ndarray] = None
+        self._rects_cache: Optional[np.ndarray] = None
+        self._beacons_xy_cache: Optional[np.ndarray] = None
+        self._tree_cache: Optional[STRtree] = None
+
+    @cached_property
+    def boundary(self) -> LineString:
+        """The boundary as a Shapely LineString, built only when first needed."""
+        return LineString(self.boundary_coords)
+
+    @cached_property
+    def _boundary_lines(self) -> np.ndarray:
+        """The boundary's four sides as prepared Shapely LineStrings."""
+        boundary_lines = shapely.linestrings(self._boundary_edges.reshape(-1, 2, 2))
+        shapely.prepare(boundary_lines)
+        return boundary_lines
+
+    @property
+    def _edges(self) -> np.ndarray:
+        """Segments of the boundary and non-rectangular obstacles as an (E, 4) array."""
+        if self._edges_cache is None:
+            self._edges_cache = np.vstack(
+                [self._boundary_edges]
+                + [self._extract_edges(obstacle) for obstacle in self.obstacles
+                   if not self._is_axis_aligned_rect(obstacle)]
+            ).astype(np.float32)
+        return self._edges_cache
+
+    @property
+    def _rects(self) -> np.ndarray:
+        """Axis-aligned rectangular obstacles as (N, 4) rows of (x_min, y_min, x_max, y_max)."""
+        if self._rects_cache is None:
+            self._rects_cache = np.array(
+                [obstacle.bounds for obstacle in self.obstacles
+                 if self._is_axis_aligned_rect(obstacle)], dtype=np.float32
+            ).reshape(-1, 4)
+        return self._rects_cache
+
+    @property
+    def _beacons_xy(self) -> np.ndarray:
+        """Beacon positions as a (B, 2) array."""
+        if self._beacons_xy_cache is None:
+            self._beacons_xy_cache = np.array(
+                [[beacon.x, beacon.y] for beacon in self.beacons], dtype=np.float32
+            ).reshape(-1, 2)
+        return self._beacons_xy_cache
+
+    @property
+    def _tree(self) -> STRtree:
+        """Spatial index over the bounding boxes of the boundary sides and obstacles."""
+        if self._tree_cache is None:
+            self._tree_cache = STRtree(list(self._boundary_lines) + self.obstacles)
+        return self._tree_cache
+
     def _add_obstacle(self, obstacle: BaseGeometry) -> None:
         """
         Add an obstacle to the map.
@@ -55,7 +177,11 @@ class Map:
         Args:
             obstacle (BaseGeometry): A geometric object representing an obstacle.
         """
+        shapely.prepare(obstacle)
         self.obstacles.append(obstacle)
+        self._edges_cache = None
+        self._rects_cache = None
+        self._tree_cache = None
 
     def _add_beacon(self, beacon: Point) -> None:
         """
@@ -65,6 +191,7 @@ class Map:
             beacon (Point): A point representing the beacon's location.
         """
         self.beacons.append(beacon)
+        self._beacons_xy_cache = None
 
     def return_se_to_closest_beacon(self, point: np.ndarray) -> float:
         """
@@ -74,137 +201,263 @@ class Map:
             point (np.ndarray): The point to calculate distance from [x, y] or [x, y, 0].
 
         Returns:
-            float: MSE to the closest beacon, or -10e5 if no beacons exist.
+            float: SE to the closest beacon, or 10e5 if no beacons exist.
         """
         if not self.beacons:
             return 10e5
 
-        # Convert numpy array point to Shapely Point for distance calculation
-        shapely_point = Point(point[0], point[1])
-
-        # Calculate squared distances to all beacons
-        distances = [shapely_point.distance(beacon) for beacon in self.beacons]
+        # Squared distances to all beacons, without taking square roots
+        squared_distances = ((self._beacons_xy - point[:2]) ** 2).sum(axis=1)
 
         # Return the minimum squared distance
-        return min(distances) ** 2
+        return float(squared_distances.min())
+
+    def _is_axis_aligned_rect(self, geom: BaseGeometry) -> bool:
+        """
+        Check whether a geometry is a rectangle with sides parallel to the axes.
+
+        Such obstacles are ray cast with a slab test instead of per-edge tests.
 
-    def _extract_points(self, geom: BaseGeometry) -> List[Point]:
+        Args:
+            geom (BaseGeometry): The geometry to check.
+
+        Returns:
+            bool: True if the geometry is an axis-aligned rectangle.
         """
-        Extract representative points from a geometry.
+        if geom.geom_type != 'Polygon' or geom.is_empty or geom.interiors:
+            return False
+        coords = np.asarray(geom.exterior.coords)[:, :2]
+        if len(coords) != 5:
+            return False
+        sides = np.diff(coords, axis=0)
+        return bool(np.all((sides[:, 0] == 0) | (sides[:, 1] == 0)))
+
+    def _extract_edges(self, geom: BaseGeometry) -> np.ndarray:
+        """
+        Extract the straight segments making up a geometry.
 
-        - For a Point, returns [geom].
-        - For a MultiPoint, returns all its points.
-        - For LineString or LinearRing, returns all vertices of the line.
-        - For MultiLineString, returns all vertices from each line.
-        - For GeometryCollection, recursively processes each geometry.
-        - For Polygon, returns vertices along the boundary.
+        - For a Polygon, returns the edges of its exterior and interior rings.
+        - For LineString or LinearRing, returns the segments between vertices.
+        - For multi-part geometries, recursively processes each part.
+        - For Points, returns no edges.
 
         Args:
-            geom (BaseGeometry): The geometry to extract points from.
+            geom (BaseGeometry): The geometry to extract edges from.
 
         Returns:
-            List[Point]: A list of representative points extracted from the geometry.
+            np.ndarray: An (E, 4) array of segments as (x1, y1, x2, y2).
         """
-        points: List[Point] = []
-        if geom.is_empty:
-            return points
-
-        if geom.geom_type == 'Point':
-            points.append(geom)
-        elif geom.geom_type == 'MultiPoint':
-            points.extend(list(geom.geoms))
+        if geom.is_empty or geom.geom_type in ['Point', 'MultiPoint']:
+            return np.empty((0, 4))
+
+        if geom.geom_type == 'Polygon':
+            rings = [geom.exterior, *geom.interiors]
         elif geom.geom_type in ['LineString', 'LinearRing']:
-            # Return all vertices of the line instead of just the midpoint
-            points.extend([Point(p) for p in geom.coords])
-        elif geom.geom_type == 'MultiLineString':
-            for line in geom.geoms:
-                points.extend([Point(p) for p in line.coords])
-        elif geom.geom_type == 'Polygon':
-            # Return points along the boundary instead of just the centroid
-            boundary = geom.boundary
-            points.extend([Point(p) for p in boundary.coords])
-        elif geom.geom_type == 'GeometryCollection':
-            for g in geom.geoms:
-                points.extend(self._extract_points(g))
+            rings = [geom]
         else:
-            # For other geometries, use the centroid as a fallback
-            points.append(geom.centroid)
-        return points
+            return np.vstack([np.empty((0, 4))] + [self._extract_edges(g) for g in geom.geoms])
 
-    def intersections(self, geom: BaseGeometry) -> List[Point]:
+        edges = []
+        for ring in rings:
+            coords = np.asarray(ring.coords, dtype=np.float64)[:, :2]
+            edges.append(np.hstack([coords[:-1], coords[1:]]))
+        return np.vstack(edges)
+
+    def intersections(self, geom: BaseGeometry) -> np.ndarray:
         """
         Find intersections between a given geometry and the map's features.
 
         Checks for intersections with the map's boundary and all obstacles,
-        and returns representative intersection points.
+        and returns the coordinates of the intersection geometries.
 
         Args:
             geom (BaseGeometry): The geometry to check for intersections.
 
         Returns:
-            List[Point]: A list of points where intersections occur.
+            np.ndarray: An (N, 2) array of points where intersections occur.
+        """
+        # Intersection with each boundary side or obstacle whose bounding box
+        # overlaps the geometry. The prepared geometries weed out bounding-box
+        # false positives, and the remaining intersections are computed in a
+        # single vectorized call
+        candidates = self._tree.geometries.take(self._tree.query(geom))
+        candidates = candidates[shapely.intersects(candidates, geom)]
+        return shapely.get_coordinates(shapely.intersection(candidates, geom))
+
+    def _ray_edge_hits(self, origin: np.ndarray,
+                       dirs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        intersections: List[Point] = []
+        Intersect every ray with every edge of the map's boundary and obstacles.
 
-        # Intersection with the map boundary
-        boundary_intersection = self.boundary.intersection(geom)
-        if not boundary_intersection.is_empty:
-            intersections.extend(self._extract_points(boundary_intersection))
+        Solves origin + t * dir = a + u * (b - a) for every ray/edge pair at
+        once, where the ray spans t in [0, 1] and the edge spans u in [0, 1].
 
-        # Intersection with each obstacle
-        for obstacle in self.obstacles:
-            obs_intersection = obstacle.intersection(geom)
-            if not obs_intersection.is_empty:
-                intersections.extend(self._extract_points(obs_intersection))
+        Args:
+            origin (np.ndarray): The shared ray origin [x, y].
+            dirs (np.ndarray): An (R, 2) array of ray vectors (direction * length).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (R, E) hit parameters t and a mask of
+            the pairs that actually intersect.
+        """
+        starts = self._edges[:, :2]
+        edge_dirs = self._edges[:, 2:] - starts
+        offsets = starts - origin
+
+        # (R, E) ray/edge cross products
+        denom = np.outer(dirs[:, 0], edge_dirs[:, 1]) - np.outer(dirs[:, 1], edge_dirs[:, 0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (offsets[:, 0] * edge_dirs[:, 1] - offsets[:, 1] * edge_dirs[:, 0]) / denom
+            u = (np.outer(dirs[:, 1], offsets[:, 0]) - np.outer(dirs[:, 0], offsets[:, 1])) / denom
+
+        hit = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+        return t, hit
+
+    def _origin_blocked(self, origin: np.ndarray) -> bool:
+        """
+        Check whether a ray origin lies on the boundary or inside an obstacle.
+
+        Every ray from such an origin hits the map at distance 0.
+
+        Args:
+            origin (np.ndarray): The ray origin [x, y].
+
+        Returns:
+            bool: True if the origin touches the boundary or an obstacle.
+        """
+        return len(self._tree.query(Point(origin), predicate='intersects')) > 0
+
+    def _first_hits(self, origin: np.ndarray, dirs: np.ndarray) -> np.ndarray:
+        """
+        Find where each ray first hits the map's boundary or obstacles.
+
+        Args:
+            origin (np.ndarray): The shared ray origin [x, y].
+            dirs (np.ndarray): An (R, 2) array of ray vectors (direction * length).
+
+        Returns:
+            np.ndarray: The smallest hit parameter t of each ray, or inf if it hits nothing.
+        """
+        if self._origin_blocked(origin):
+            return np.zeros(len(dirs), dtype=dirs.dtype)
+
+        if HAS_NUMBA:
+            t_min = _first_hits_kernel(origin[0], origin[1],
+                                       np.ascontiguousarray(dirs), self._edges)
+            t_min[t_min > 1.0] = np.inf
+        else:
+            t, hit = self._ray_edge_hits(origin, dirs)
+            t_min = np.where(hit, t, np.inf).min(axis=1, initial=np.inf)
+
+        return np.minimum(t_min, self._slab_hits(origin, dirs))
+
+    def _segments_hit(self, origin: np.ndarray, dirs: np.ndarray) -> np.ndarray:
+        """
+        Check which rays hit the map's boundary or obstacles at all.
+
+        Args:
+            origin (np.ndarray): The shared ray origin [x, y].
+            dirs (np.ndarray): An (R, 2) array of ray vectors (direction * length).
+
+        Returns:
+            np.ndarray: An (R,) boolean mask of the rays that are blocked.
+        """
+        if self._origin_blocked(origin):
+            return np.ones(len(dirs), dtype=bool)
+
+        if HAS_NUMBA:
+            hits = _segments_hit_kernel(origin[0], origin[1],
+                                        np.ascontiguousarray(dirs), self._edges)
+        else:
+            hits = self._ray_edge_hits(origin, dirs)[1].any(axis=1)
+
+        return hits | np.isfinite(self._slab_hits(origin, dirs))
+
+    def _slab_hits(self, origin: np.ndarray, dirs: np.ndarray) -> np.ndarray:
+        """
+        Find where each ray first hits an axis-aligned rectangular obstacle.
+
+        Uses the slab test: a ray is inside a rectangle for t between the
+        largest entry and the smallest exit parameter over the x and y slabs.
 
-        return intersections
+        Args:
+            origin (np.ndarray): The shared ray origin [x, y].
+            dirs (np.ndarray): An (R, 2) array of ray vectors (direction * length).
+
+        Returns:
+            np.ndarray: The smallest hit parameter t of each ray, or inf if it hits nothing.
+        """
+        rects = self._rects
+
+        # (R, N) parameters where each ray crosses each rectangle's slab planes
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_dirs = 1.0 / dirs
+            tx1 = np.outer(inv_dirs[:, 0], rects[:, 0] - origin[0])
+            tx2 = np.outer(inv_dirs[:, 0], rects[:, 2] - origin[0])
+            ty1 = np.outer(inv_dirs[:, 1], rects[:, 1] - origin[1])
+            ty2 = np.outer(inv_dirs[:, 1], rects[:, 3] - origin[1])
+
+        # fmin/fmax skip the NaNs of rays lying exactly on a slab plane
+        t_enter = np.fmax(np.fmin(tx1, tx2), np.fmin(ty1, ty2))
+        t_exit = np.fmin(np.fmax(tx1, tx2), np.fmax(ty1, ty2))
+
+        # A ray starting inside a rectangle hits it immediately, at t = 0
+        t_hit = np.maximum(t_enter, 0)
+        hit = (t_enter <= t_exit) & (t_exit >= 0) & (t_hit <= 1)
+        return np.where(hit, t_hit, np.inf).min(axis=1, initial=np.inf)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _unit_dirs(delta_theta: float) -> np.ndarray:
+        """Unit direction vectors of the LiDAR rays, one every delta_theta degrees."""
+        thetas = np.deg2rad(np.arange(0, 360, delta_theta))
+        unit_dirs = np.column_stack([np.cos(thetas), np.sin(thetas)]).astype(np.float32)
+        # Shared between calls, so guard against in-place modification
+        unit_dirs.flags.writeable = False
+        return unit_dirs
 
     def calc_lidar_point_cloud(self,
                                pos_true: np.array,
                                delta_theta: float,
                                r_max: float,
-                               r_min: float):
-        """Calculate the LiDAR point cloud for a given robot position."""
-        # Create the line segments for the LiDAR rays
-        ray_segments = []
-        for theta in range(0, 360, delta_theta):
-            x_end = pos_true[0] + r_max * math.cos(math.radians(theta))
-            y_end = pos_true[1] + r_max * math.sin(math.radians(theta))
-            ray_segments.append(LineString([(pos_true[0], pos_true[1]), (x_end, y_end)]))
-
-        # Find closest intersection points
-        point_cloud = []
-        robot_pos = Point(pos_true[0], pos_true[1])
-        for ray in ray_segments:
-            intersections = self.intersections(ray)
-            if intersections:
-                # Find the closest intersection point
-                closest_point = min(intersections, key=lambda p: robot_pos.distance(p))
-                # Discard points outside the valid range
-                distance = robot_pos.distance(closest_point)
-                if r_min <= distance <= r_max:
-                    point_cloud.append(closest_point)
-            else:
-                # No intersection, add the ray's endpoint
-                point_cloud.append(Point(ray.coords[-1]))
-
-        return [np.array([p.x - pos_true[0], p.y - pos_true[1], 0]) for p in point_cloud]
-
-
-    def calc_beacon_positions(self, pos_true: np.array) -> List[np.array]:
-        """Calculate the positions of beacons relative to the robot."""
-        # Calculate the line segments from the robot to each beacon
-        pos_true_shapely = Point([pos_true[0], pos_true[1]])
-        beacon_positions = []
-        for beacon in self.beacons:
-            beacon_line = LineString([pos_true_shapely, beacon])
-            intersections = self.intersections(beacon_line)
-            if intersections:
-                continue    # robot cannot see the beacon
-            else:
-                beacon_positions.append(np.array(
-                    [beacon.x - pos_true[0], beacon.y - pos_true[1], 0]
-                ))
+                               r_min: float) -> np.ndarray:
+        """
+        Calculate the LiDAR point cloud for a given robot position.
+
+        Returns:
+            np.ndarray: An (N, 3) array of hit points relative to the robot.
+        """
+        origin = np.asarray(pos_true[:2], dtype=np.float32)
+        dirs = r_max * self._unit_dirs(delta_theta)
+
+        t_min = self._first_hits(origin, dirs)
+        # No intersection, use the ray's endpoint
+        t_min[np.isinf(t_min)] = 1.0
+
+        # Discard points outside the valid range
+        distances = t_min * r_max
+        valid = (r_min <= distances) & (distances <= r_max)
+
+        point_cloud = np.zeros((np.count_nonzero(valid), 3), dtype=np.float32)
+        point_cloud[:, :2] = t_min[valid, None] * dirs[valid]
+        return point_cloud
+
+    def calc_beacon_positions(self, pos_true: np.array) -> np.ndarray:
+        """
+        Calculate the positions of beacons relative to the robot.
+
+        Returns:
+            np.ndarray: An (N, 3) array of visible beacon positions relative to the robot.
+        """
+        # Cast a ray from the robot to each beacon
+        origin = np.asarray(pos_true[:2], dtype=np.float32)
+        rays = self._beacons_xy - origin
+
+        # Robot cannot see beacons whose ray hits the boundary or an obstacle
+        visible = ~self._segments_hit(origin, rays)
+
+        beacon_positions = np.zeros((np.count_nonzero(visible), 3), dtype=np.float32)
+        beacon_positions[:, :2] = rays[visible]
         return beacon_positions
 
 # Map for particle vs kalman mse
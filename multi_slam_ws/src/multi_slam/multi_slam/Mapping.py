@@ -1,21 +1,55 @@
 import numpy as np
+from multi_slam._fast import bresenham_lines, fused_occupancy
 
 class BeaconManager:
     """Class to handle beacon tracking and comparison"""
 
-    def __init__(self, distance_threshold=2.0):
+    def __init__(self, distance_threshold=2.0, capacity=16):
         """Initialize BeaconManager"""
-        # Standard beacons (from sensor observations)
-        self.beacon_positions = []
-        self.beacon_covariances = []
+        # Standard beacons (from sensor observations), stored as growable
+        # (capacity, 3) position and (capacity, 3, 3) covariance buffers
+        self.n_beacons = 0
+        self._beacon_positions = np.empty((capacity, 3))
+        self._beacon_covariances = np.empty((capacity, 3, 3))
 
         # Particle-based beacons
         self.particle_beacons = []  # List of lists of particles for each beacon
-        self.particle_averages = []  # Average position of each beacon's particles
-        self.particle_covariances = []  # Covariance of each beacon's particles
+        self.n_particle_beacons = 0
+        # Average position and covariance of each beacon's particles
+        self._particle_averages = np.empty((capacity, 3))
+        self._particle_covariances = np.empty((capacity, 3, 3))
 
         self.distance_threshold = distance_threshold
 
+    @property
+    def beacon_positions(self):
+        """(N, 3) array of standard beacon positions"""
+        return self._beacon_positions[:self.n_beacons]
+
+    @property
+    def beacon_covariances(self):
+        """(N, 3, 3) array of standard beacon covariances"""
+        return self._beacon_covariances[:self.n_beacons]
+
+    @property
+    def particle_averages(self):
+        """(M, 3) array of particle-based beacon positions"""
+        return self._particle_averages[:self.n_particle_beacons]
+
+    @property
+    def particle_covariances(self):
+        """(M, 3, 3) array of particle-based beacon covariances"""
+        return self._particle_covariances[:self.n_particle_beacons]
+
+    @staticmethod
+    def _grow(buffer, n):
+        """Return buffer with room for at least n + 1 rows, doubling its capacity when full"""
+        if n < len(buffer):
+            return buffer
+        grown = np.empty((max(1, 2 * len(buffer)),) + buffer.shape[1:])
+        grown[:n] = buffer[:n]
+        return grown
+
     def find_closest_beacon(self, point, use_particles=False):
         """Find closest beacon to a point
 
@@ -29,10 +63,10 @@ class BeaconManager:
         positions = self.particle_averages if use_particles else self.beacon_positions
         covariances = self.particle_covariances if use_particles else self.beacon_covariances
 
-        if not positions:
+        if len(positions) == 0:
             return None, None, None
 
-        distances = np.linalg.norm(np.array(positions) - point, axis=1)
+        distances = np.linalg.norm(positions - point, axis=1)
         index = np.argmin(distances)
         min_distance = distances[index]
 
@@ -96,9 +130,13 @@ class BeaconManager:
             return closest_idx
         else:
             # Add new beacon
-            self.beacon_positions.append(position)
-            self.beacon_covariances.append(covariance)
-            return len(self.beacon_positions) - 1
+            n = self.n_beacons
+            self._beacon_positions = self._grow(self._beacon_positions, n)
+            self._beacon_covariances = self._grow(self._beacon_covariances, n)
+            self._beacon_positions[n] = position
+            self._beacon_covariances[n] = covariance
+            self.n_beacons += 1
+            return n
 
     def update_beacon_particles(self, cluster, covariance=None):
         """Add particles to a beacon or create a new beacon
@@ -120,13 +158,17 @@ class BeaconManager:
             return index
         else:
             # Create new beacon
+            n = self.n_particle_beacons
+            self._particle_averages = self._grow(self._particle_averages, n)
+            self._particle_covariances = self._grow(self._particle_covariances, n)
             self.particle_beacons.append(list(cluster))
-            self.particle_averages.append(np.mean(cluster, axis=0))
+            self._particle_averages[n] = np.mean(cluster, axis=0)
 
             # Calculate covariance from the cluster or use provided covariance
             cluster_cov = np.cov(np.array(cluster).T) if len(cluster) > 1 else np.eye(3)
-            self.particle_covariances.append(covariance if covariance is not None else cluster_cov)
-            return len(self.particle_beacons) - 1
+            self._particle_covariances[n] = covariance if covariance is not None else cluster_cov
+            self.n_particle_beacons += 1
+            return n
 
 class Mapping:
     def __init__(self,
@@ -139,9 +181,11 @@ class Mapping:
         self.map_origin = map_origin
         self.grid_width = int(map_size[0] / grid_size)
         self.grid_height = int(map_size[1] / grid_size)
-        self.lor_grid = np.zeros((self.grid_width, self.grid_height))
-        self.lor_grid_guess = np.zeros((self.grid_width, self.grid_height))
-        self.lor_known = np.zeros((self.grid_width, self.grid_height)) # 1 for known, 0 for unknown
+        # float32 log-odds halve the memory traffic of the per-publish occupancy conversion
+        self.lor_grid = np.zeros((self.grid_width, self.grid_height), dtype=np.float32)
+        self.lor_grid_guess = np.zeros((self.grid_width, self.grid_height), dtype=np.float32)
+        # 1 for known, 0 for unknown
+        self.lor_known = np.zeros((self.grid_width, self.grid_height), dtype=np.int8)
 
         # Constants
         self.L_FREE = -0.1
@@ -150,22 +194,44 @@ class Mapping:
         self.BEACON_DIST_THRESH = 2
         self.LOR_SATURATION = 100
 
+        # Occupancy (0-100) lookup table over the clipped log-odds range
+        self.OCC_LOR_CLIP = 10.0
+        self.OCC_LUT_SIZE = 1024
+        lut_lor = np.linspace(-self.OCC_LOR_CLIP, self.OCC_LOR_CLIP, self.OCC_LUT_SIZE)
+        self.occ_lut = (100 / (1 + np.exp(-lut_lor))).astype(np.int8)
+
         # Create beacon manager
         self.beacon_manager = BeaconManager(distance_threshold=self.BEACON_DIST_THRESH)
 
         # For backward compatibility
-        self.beacon_positions = self.beacon_manager.beacon_positions
-        self.beacon_covariances = self.beacon_manager.beacon_covariances
-        self.average_beacon_positions_by_particle = self.beacon_manager.particle_averages
-        self.beacon_covariances_by_particle = self.beacon_manager.particle_covariances
         self.total_beacon_particles = self.beacon_manager.particle_beacons
 
+    @property
+    def beacon_positions(self):
+        """(N, 3) array of beacon positions"""
+        return self.beacon_manager.beacon_positions
+
+    @property
+    def beacon_covariances(self):
+        """(N, 3, 3) array of beacon covariances"""
+        return self.beacon_manager.beacon_covariances
+
+    @property
+    def average_beacon_positions_by_particle(self):
+        """(M, 3) array of particle-based beacon positions"""
+        return self.beacon_manager.particle_averages
+
+    @property
+    def beacon_covariances_by_particle(self):
+        """(M, 3, 3) array of particle-based beacon covariances"""
+        return self.beacon_manager.particle_covariances
+
     def update(self,
                robot_pos: np.ndarray,
                robot_cov: np.ndarray,
-               lidar_data: list[np.ndarray],
+               lidar_data: np.ndarray,
                lidar_range: tuple[float, float],
-               beacon_data: list[np.ndarray],
+               beacon_data: np.ndarray,
                beacon_particles: list[list[np.ndarray]]):
         """
         Update the map with new sensor data.
@@ -173,52 +239,54 @@ class Mapping:
         Args:
             robot_pos: Robot position (x,y,z) in world coordinates
             robot_cov: 3x3 covariance matrix of robot position
-            lidar_data: List of (x,y,z) points in robot frame
+            lidar_data: (N, 3) array of (x,y,z) points in robot frame
             lidar_range: (min_range, max_range) of the LiDAR in meters10
-            beacon_data: List of (x,y,z) beacon positions in robot frame
+            beacon_data: (M, 3) array of (x,y,z) beacon positions in robot frame
         """
-        if not lidar_data and not beacon_data:
+        if len(lidar_data) == 0 and len(beacon_data) == 0:
             return
 
-        if lidar_data:
+        if len(lidar_data) > 0:
             # discount points after beam breaks
-            lidar_array = np.array(lidar_data)
+            lidar_array = np.asarray(lidar_data, dtype=np.float64)
 
             distances = np.linalg.norm(lidar_array[:, :2], axis=1)
-
-            # Process each valid point
-            for i, point in enumerate(lidar_array):
-                point_world = robot_pos + point
-                hit = (distances[i] < lidar_range[1] - 0.01)
-                theta = np.arctan2(point[1], point[0])
-                max_point = point_world + lidar_range[1] * np.array([np.cos(theta), np.sin(theta), 0])
-
-                pos_grid = self._coord_to_grid(robot_pos[0], robot_pos[1])
-                point_grid = self._coord_to_grid(point_world[0], point_world[1])
-                max_point_grid = self._coord_to_grid(max_point[0], max_point[1])
-
-                # Get grid cells along the ray
-                ray_cells = self._bresenham_line(pos_grid, point_grid)
-                extended_ray_cells = self._bresenham_line(point_grid, max_point_grid)
-
-                # Update cells - mark all but last as free
-                for (grid_x, grid_y) in ray_cells[:-1]:
-                    self.lor_grid[grid_y, grid_x] += self.L_FREE
-                    self.lor_known[grid_y, grid_x] = 1
-
-                if not hit:
-                    continue
-
-                if len(ray_cells) > 0:
-                    grid_x, grid_y = ray_cells[-1]
-                    self.lor_grid[grid_y, grid_x] += self.L_OCC
-                    self.lor_known[grid_y, grid_x] = 1
-                if len(extended_ray_cells) > 0:
-                    for (grid_x, grid_y) in extended_ray_cells:
-                        self.lor_grid_guess[grid_y, grid_x] += self.L_OCC_GUESS
+            hits = distances < lidar_range[1] - 0.01
+            thetas = np.arctan2(lidar_array[:, 1], lidar_array[:, 0])
+
+            points_world = robot_pos[:2] + lidar_array[:, :2]
+            ray_dirs = np.column_stack([np.cos(thetas), np.sin(thetas)])
+            max_points = points_world + lidar_range[1] * ray_dirs
+
+            pos_grid = self._coord_to_grid(robot_pos[0], robot_pos[1])
+            point_grids = self._coords_to_grid(points_world)
+            max_point_grids = self._coords_to_grid(max_points)
+
+            # Get grid cells along every ray from the robot to its point
+            starts = np.broadcast_to(pos_grid, point_grids.shape)
+            ray_cells, ray_counts = bresenham_lines(starts, point_grids)
+            ray_ends = np.cumsum(ray_counts) - 1
+
+            # Mark all but the last cell of each ray as free
+            is_free = np.ones(len(ray_cells), dtype=bool)
+            is_free[ray_ends[ray_counts > 0]] = False
+            free_cells = ray_cells[is_free]
+
+            # The last cell of a ray that hit something is occupied,
+            # and cells behind it are guessed occupied
+            occ_cells = ray_cells[ray_ends[hits & (ray_counts > 0)]]
+            guess_cells, _ = bresenham_lines(point_grids[hits], max_point_grids[hits])
+
+            # Rays overlap, so accumulate repeated cells with np.add.at
+            np.add.at(self.lor_grid, (free_cells[:, 1], free_cells[:, 0]), self.L_FREE)
+            self.lor_known[free_cells[:, 1], free_cells[:, 0]] = 1
+            np.add.at(self.lor_grid, (occ_cells[:, 1], occ_cells[:, 0]), self.L_OCC)
+            self.lor_known[occ_cells[:, 1], occ_cells[:, 0]] = 1
+            np.add.at(self.lor_grid_guess, (guess_cells[:, 1], guess_cells[:, 0]),
+                      self.L_OCC_GUESS)
 
         # Process beacon data with beacon manager
-        if beacon_data:
+        if len(beacon_data) > 0:
             for measurement in beacon_data:
                 measurement_world = robot_pos + measurement
                 self.beacon_manager.update_standard_beacon(measurement_world, robot_cov)
@@ -230,8 +298,8 @@ class Mapping:
 
         # Apply log-odds bounds to prevent saturation
         sat = self.LOR_SATURATION
-        self.lor_grid = np.clip(self.lor_grid, -sat, sat)
-        self.lor_grid_guess = np.clip(self.lor_grid_guess, -sat, sat)
+        np.clip(self.lor_grid, -sat, sat, out=self.lor_grid)
+        np.clip(self.lor_grid_guess, -sat, sat, out=self.lor_grid_guess)
 
     def get_closest_beacon(self, point_world, compare_with_beacon_particles=False):
         """
@@ -252,25 +320,6 @@ class Mapping:
         position, index = self.beacon_manager.determine_beacon_match(cluster)
         return position, index
 
-    def _bresenham_line(self, start, end):
-        """
-        Takes in two grid coordinates and returns the cells that lie along the line.
-        """
-        # Extract the coordinates
-        (xs, ys) = start[:2]
-        (xe, ye) = end[:2]
-
-        if xs == xe or ys == ye:
-            return []
-
-        # Move along ray (excluding endpoint).
-        if (np.abs(xe-xs) >= np.abs(ye-ys)):
-            return[(u, int(ys + (ye-ys)/(xe-xs) * (u+0.5-xs)))
-                   for u in range(int(xs), int(xe), int(np.sign(xe-xs)))]
-        else:
-            return[(int(xs + (xe-xs)/(ye-ys) * (v+0.5-ys)), v)
-                   for v in range(int(ys), int(ye), int(np.sign(ye-ys)))]
-
     def _coord_to_grid(self, x, y):
         """Convert world coordinates to grid coordinates"""
         grid_x = int((x - self.map_origin[0]) / self.grid_size)
@@ -280,6 +329,13 @@ class Mapping:
         grid_y = np.clip(grid_y, 0, self.grid_height - 1)
         return grid_x, grid_y
 
+    def _coords_to_grid(self, coords):
+        """Convert an (N, 2) array of world coordinates to grid coordinates"""
+        grid = ((coords - self.map_origin) / self.grid_size).astype(np.intp)
+        grid[:, 0] = np.clip(grid[:, 0], 0, self.grid_width - 1)
+        grid[:, 1] = np.clip(grid[:, 1], 0, self.grid_height - 1)
+        return grid
+
     def _grid_to_coord(self, x, y):
         """
         Convert grid indices to world coordinates (center of the cell).
@@ -297,7 +353,7 @@ class Mapping:
 
     def world_to_prob(self, world_x, world_y):
         grid_x, grid_y = self._coord_to_grid(world_x, world_y)
-        lor = self.lor_grid[grid_x, grid_y]
+        lor = float(self.lor_grid[grid_x, grid_y])
         prob = np.exp(lor) / (1 + np.exp(lor))
         return prob
 
@@ -316,7 +372,7 @@ class Mapping:
         grid_y = ((coords[:, 1] - self.map_origin[1]) / self.grid_size).astype(int)
 
         # Get log odds values
-        log_odds = self.lor_grid[grid_x, grid_y]
+        log_odds = self.lor_grid[grid_x, grid_y].astype(np.float64)
 
         # Convert to probabilities using vectorized operations
         probs = np.exp(log_odds) / (1 + np.exp(log_odds))
@@ -324,9 +380,26 @@ class Mapping:
         return probs
 
 
+    def _get_log_odds_grid(self):
+        """
+        Get the log-odds grid, using guessed occupancy for unknown cells.
+        """
+        return np.where(self.lor_known, self.lor_grid, self.lor_grid_guess)
+
     def get_prob_grid(self):
         """
         Get the probability grid.
         """
-        log_odds_grid = self.lor_grid * self.lor_known + self.lor_grid_guess * (1 - self.lor_known)
+        # float64 so exp does not overflow at the saturation bound
+        log_odds_grid = self._get_log_odds_grid().astype(np.float64)
         return np.exp(log_odds_grid) / (1 + np.exp(log_odds_grid))
+
+    def get_occupancy_grid(self, out=None):
+        """
+        Get the flattened occupancy grid as int8 values in [0, 100] for an OccupancyGrid message.
+
+        Args:
+            out: Optional flat int8 array to write the result into
+        """
+        return fused_occupancy(self.lor_grid, self.lor_known, self.lor_grid_guess,
+                               self.occ_lut, self.OCC_LOR_CLIP, out=out)
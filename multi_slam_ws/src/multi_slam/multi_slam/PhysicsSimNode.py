@@ -8,6 +8,7 @@ from std_msgs.msg import Header, Bool
 import numpy as np
 from visualization_msgs.msg import Marker
 import math
+import shapely
 from shapely.geometry import Point
 
 
@@ -56,6 +57,8 @@ class PhysicsSimNode(Node):
 
         self.declare_parameter("collision_buffer", 0.1)
         self.collision_buffer = self.get_parameter("collision_buffer").value
+        # Collision footprint centered at the origin, translated to each test position
+        self.robot_footprint = Point(0, 0).buffer(self.collision_buffer)
         
         self.declare_parameter("collision_increment", 0.02)
         self.collision_increment = self.get_parameter("collision_increment").value
@@ -118,8 +121,7 @@ class PhysicsSimNode(Node):
 
     def particles_callback(self, msg: PointCloud2):
         """Store particle positions from SLAM node."""
-        points = list(pc2.read_points(msg, field_names=("x", "y", "z"), skip_nans=True))
-        self.particles = np.array([np.array([p[0], p[1], p[2]]) for p in points])
+        self.particles = pc2.read_points_numpy(msg, field_names=("x", "y", "z"), skip_nans=True)
 
     def slam_done_cb(self, _: Bool):
         """Mark SLAM processing as complete."""
@@ -132,21 +134,14 @@ class PhysicsSimNode(Node):
 
     def _apply_2d_noise(self, points: np.array, std_dev: float):
         """Apply Gaussian noise to 2D points to simulate sensor noise."""
-        noisy_points = []
-        for point in points:
-            noisy_point = np.array(
-                [
-                    point[0] + np.random.normal(0, std_dev),
-                    point[1] + np.random.normal(0, std_dev),
-                    0,
-                ]
-            )
-            noisy_points.append(noisy_point)
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        noisy_points = np.zeros_like(points)
+        noisy_points[:, :2] = points[:, :2] + np.random.normal(0, std_dev, (len(points), 2))
         return noisy_points
 
     def create_robot_polygon(self, position):
         """Create a circular buffer around the robot for collision detection."""
-        return Point(position[0], position[1]).buffer(self.collision_buffer)
+        return shapely.transform(self.robot_footprint, lambda coords: coords + position[:2])
 
     def check_collision(self, current_pos, intended_pos):
         """
@@ -158,7 +153,7 @@ class PhysicsSimNode(Node):
         # Create a circular buffer at the intended position
         robot_circle = self.create_robot_polygon(intended_pos)
         
-        if not MAP.intersections(robot_circle):
+        if len(MAP.intersections(robot_circle)) == 0:
             return intended_pos
             
         # Calculate direction from current to intended position
@@ -169,7 +164,7 @@ class PhysicsSimNode(Node):
         ])
         
         # Calculate distance between current and intended position
-        distance = math.sqrt(direction[0]**2 + direction[1]**2)
+        distance = math.hypot(direction[0], direction[1])
         
         # If no movement, return current position
         if distance < 1e-6:
@@ -204,7 +199,7 @@ class PhysicsSimNode(Node):
             test_poly = self.create_robot_polygon(test_pos)
             
             # Check for collisions at test position
-            test_collides = bool(MAP.intersections(test_poly))
+            test_collides = len(MAP.intersections(test_poly)) > 0
                 
             # If collision detected, return the last safe position
             if test_collides:
@@ -236,17 +231,8 @@ class PhysicsSimNode(Node):
         lidar_msg = pc2.create_cloud_xyz32(header, noisy_points)
         self.lidar_pub.publish(lidar_msg)
 
-        lidar_points_world = []
-        for point in noisy_points:
-            lidar_points_world.append(
-                np.array(
-                    [
-                        point[0] + self.pos_true[0],
-                        point[1] + self.pos_true[1],
-                        0,
-                    ]
-                )
-            )
+        lidar_points_world = noisy_points.copy()
+        lidar_points_world[:, :2] += self.pos_true[:2]
         lidar_points_world_msg = pc2.create_cloud_xyz32(
             header, lidar_points_world
         )
@@ -263,17 +249,8 @@ class PhysicsSimNode(Node):
         beacon_msg = pc2.create_cloud_xyz32(header, noisy_points)
         self.beacon_pub.publish(beacon_msg)
 
-        beacon_positions_world = []
-        for point in noisy_points:
-            beacon_positions_world.append(
-                np.array(
-                    [
-                        point[0] + self.pos_true[0],
-                        point[1] + self.pos_true[1],
-                        0,
-                    ]
-                )
-            )
+        beacon_positions_world = noisy_points.copy()
+        beacon_positions_world[:, :2] += self.pos_true[:2]
         beacon_positions_world_msg = pc2.create_cloud_xyz32(
             header, beacon_positions_world
         )
@@ -555,15 +555,28 @@ class Planner:
             
         # Check surrounding cells (ensure not on the edge of known space)
         radius = 2  # cells radius to check
-        for dy in range(-radius, radius+1):
-            for dx in range(-radius, radius+1):
-                ny, nx = grid_y + dy, grid_x + dx
-                if (0 <= nx < self.grid_width and 0 <= ny < self.grid_height and 
-                    self.occupancy_grid[ny, nx] == -1):
-                    return False  # Near unknown area
+        window = self._grid_window(grid_x, grid_y, radius)
+        if np.any(window == -1):
+            return False  # Near unknown area
         
         return True
 
+    def _grid_window(self, grid_x, grid_y, radius):
+        """
+        Get the square window of the occupancy grid around a cell, clipped to the grid bounds
+
+        Args:
+            grid_x (int): Center cell x
+            grid_y (int): Center cell y
+            radius (int): Window radius in cells
+
+        Returns:
+            numpy.ndarray: View of the occupancy grid, empty if the window lies outside the grid
+        """
+        y0, y1 = max(grid_y - radius, 0), max(min(grid_y + radius + 1, self.grid_height), 0)
+        x0, x1 = max(grid_x - radius, 0), max(min(grid_x + radius + 1, self.grid_width), 0)
+        return self.occupancy_grid[y0:y1, x0:x1]
+
     def check_path_collision(self, from_x, from_y, to_x, to_y):
         """
         Check if a path between two points collides with obstacles
@@ -578,7 +591,7 @@ class Planner:
             bool: True if collision, False otherwise
         """
         # Calculate distance between the two points
-        dist = math.sqrt((to_x - from_x)**2 + (to_y - from_y)**2)
+        dist = math.hypot(to_x - from_x, to_y - from_y)
         
         # Determine number of sampling points based on distance and resolution
         # 더 조밀한 샘플링을 위해 해상도의 1/4 크기로 설정
@@ -596,19 +609,14 @@ class Planner:
             
             grid_x, grid_y = self.world_to_grid(x, y)
             
-            # Check inflated area around the point for obstacles
-            for dy in range(-inflation_radius, inflation_radius+1):
-                for dx in range(-inflation_radius, inflation_radius+1):
-                    nx, ny = grid_x + dx, grid_y + dy
-                    
-                    # Skip if out of grid
-                    if nx < 0 or nx >= self.grid_width or ny < 0 or ny >= self.grid_height:
-                        continue
-                    
-                    # Check if obstacle or unknown
-                    if self.occupancy_grid[ny, nx] >= 50 or self.occupancy_grid[ny, nx] == -1:
-                        print(f"Collision detected at grid position ({nx}, {ny}) with value {self.occupancy_grid[ny, nx]}")
-                        return True  # Collision detected
+            # Check inflated area around the point for obstacles or unknown cells
+            window = self._grid_window(grid_x, grid_y, inflation_radius)
+            blocked = np.argwhere((window >= 50) | (window == -1))
+            if len(blocked) > 0:
+                ny = max(grid_y - inflation_radius, 0) + blocked[0, 0]
+                nx = max(grid_x - inflation_radius, 0) + blocked[0, 1]
+                print(f"Collision detected at grid position ({nx}, {ny}) with value {self.occupancy_grid[ny, nx]}")
+                return True  # Collision detected
         
         return False
 
@@ -720,7 +728,7 @@ class Planner:
                 self.rrt_edges.append(((nearest_node.x, nearest_node.y), (new_node.x, new_node.y)))
                 
                 # Check if reached near goal
-                dist_to_goal = math.sqrt((new_node.x - goal_node.x)**2 + (new_node.y - goal_node.y)**2)
+                dist_to_goal = math.hypot(new_node.x - goal_node.x, new_node.y - goal_node.y)
                 if dist_to_goal <= self.rrt_step_size:
                     # Check if can connect directly to goal in known area
                     if not self.check_path_collision(new_node.x, new_node.y, goal_node.x, goal_node.y):
@@ -779,7 +787,7 @@ class Planner:
         Returns:
             RRTNode: New node
         """
-        dist = math.sqrt((to_node.x - from_node.x)**2 + (to_node.y - from_node.y)**2)
+        dist = math.hypot(to_node.x - from_node.x, to_node.y - from_node.y)
         
         # If distance is less than step_size, return as is
         if dist < self.rrt_step_size:
@@ -19,6 +19,7 @@ class PlannerControllerNode(Node):
         
         # Publishers
         self.control_pub = self.create_publisher(Vector3, "control_signal", 10)
+        self.control_msg = Vector3()  # Reused for every published command
         
         # Subscribers
         self.pose_sub = self.create_subscription(
@@ -136,7 +137,7 @@ class PlannerControllerNode(Node):
 
     def publish_control(self, control_input):
         """Publish velocity command."""
-        msg = Vector3()
+        msg = self.control_msg
         msg.x = float(control_input[0])
         msg.y = float(control_input[1])
         msg.z = 0.0
@@ -1,16 +1,23 @@
 # slam_node.py
+import array
+import threading
+from collections import deque
 import rclpy
 from rclpy.node import Node
+from rclpy.callback_groups import MutuallyExclusiveCallbackGroup
+from rclpy.executors import MultiThreadedExecutor
+from rclpy.qos import HistoryPolicy, QoSProfile, ReliabilityPolicy
 from sensor_msgs.msg import PointCloud2
 from geometry_msgs.msg import Vector3, PoseStamped, Point
 from nav_msgs.msg import OccupancyGrid
 from visualization_msgs.msg import Marker, MarkerArray
 from multi_slam.Localization import Localization
 from multi_slam.Mapping import Mapping
+from multi_slam._fast import bresenham_lines
 import numpy as np
 from sensor_msgs_py import point_cloud2
 from std_msgs.msg import Header, Bool, Float32MultiArray
-from sensor_msgs_py.point_cloud2 import read_points
+from sensor_msgs_py.point_cloud2 import read_points_numpy
 from multi_slam.Planner import Planner
 
 
@@ -36,6 +43,8 @@ class PlannerSLAMNode(Node):
         self.declare_parameter('num_particles', 1000)
         self.declare_parameter('position_std_dev', 0.1)
         self.declare_parameter('initial_noise', 0.5)
+        self.declare_parameter('viz_rate_hz', 1.0)
+        self.declare_parameter('rrt_viz_every_n_steps', 10)
         
         # Planner parameters
         self.declare_parameter('use_planner', True)
@@ -58,6 +67,15 @@ class PlannerSLAMNode(Node):
         num_particles = self.get_parameter('num_particles').value
         position_std_dev = self.get_parameter('position_std_dev').value
         initial_noise = self.get_parameter('initial_noise').value
+        viz_rate_hz = self.get_parameter('viz_rate_hz').value
+        self.rrt_viz_every_n_steps = self.get_parameter('rrt_viz_every_n_steps').value
+        self.rrt_viz_step = 0
+        if viz_rate_hz <= 0:
+            raise ValueError(f"viz_rate_hz must be positive, got {viz_rate_hz}")
+        if self.rrt_viz_every_n_steps < 1:
+            raise ValueError(
+                f"rrt_viz_every_n_steps must be at least 1, got {self.rrt_viz_every_n_steps}"
+            )
         
         # Get planner parameters
         self.use_planner = self.get_parameter('use_planner').value
@@ -117,9 +135,12 @@ class PlannerSLAMNode(Node):
         self.lidar_range = (0.1, 10.0)  # min and max range in meters
         
         # Current data
-        self.lidar_data = []
-        self.beacon_data = []
+        self.lidar_data = np.empty((0, 3), dtype=np.float32)
+        self.beacon_data = np.empty((0, 3), dtype=np.float32)
         self.control_input = np.zeros(3)  # vx, vy, 0
+        self.lidar_seq = 0
+        self.beacon_seq = 0
+        self.processed_sensor_seq = None
         self.pos_hat_new = np.array([0.0, 0.0, 0.0])
         self.particles = None
         self.sim_done = True
@@ -128,27 +149,53 @@ class PlannerSLAMNode(Node):
         self.current_path = []
         
         # 목표 지점 궤적 추적을 위한 변수
-        self.goal_history = []  # 과거 목표 지점들을 저장할 리스트
         self.max_goal_history = 10  # 최대 기록할 과거 목표 지점 수
+        self.goal_history = deque(maxlen=self.max_goal_history)  # 오래된 기록은 자동으로 제거됨
+
+        # Marker pool reused across visualization calls, one marker per beacon
+        self.beacon_markers = []
+
+        # Sensor ingest only swaps buffers, so it may run alongside the SLAM update.
+        # Each sensor gets its own group so its callback never runs concurrently with itself.
+        # The SLAM update and visualization share the map and must not interleave.
+        self.lidar_group = MutuallyExclusiveCallbackGroup()
+        self.beacon_group = MutuallyExclusiveCallbackGroup()
+        self.sensor_group = MutuallyExclusiveCallbackGroup()
+        self.slam_group = MutuallyExclusiveCallbackGroup()
+        # Guards each sensor buffer together with its sequence number
+        self.sensor_lock = threading.Lock()
+
+        # Only the latest scan matters, so drop stale sensor messages instead of queueing them
+        sensor_qos = QoSProfile(
+            reliability=ReliabilityPolicy.BEST_EFFORT,
+            history=HistoryPolicy.KEEP_LAST,
+            depth=1
+        )
 
         # Subscribers
         self.create_subscription(
-            PointCloud2, "/lidar", self.lidar_callback, 10
+            PointCloud2, "/lidar", self.lidar_callback, sensor_qos,
+            callback_group=self.lidar_group
         )
         self.create_subscription(
-            PointCloud2, "/beacon", self.beacon_callback, 10
+            PointCloud2, "/beacon", self.beacon_callback, sensor_qos,
+            callback_group=self.beacon_group
         )
         self.create_subscription(
-            Vector3, "/control_signal", self.control_callback, 10
+            Vector3, "/control_signal", self.control_callback, 10,
+            callback_group=self.sensor_group
         )
         self.create_subscription(
-            PointCloud2, "/particles_pred", self.particles_pred_callback, 10
+            PointCloud2, "/particles_pred", self.particles_pred_callback, 10,
+            callback_group=self.slam_group
         )
         self.sim_done_sub = self.create_subscription(
-            Bool, "/sim_done", self.sim_done_cb, 10
+            Bool, "/sim_done", self.sim_done_cb, 10,
+            callback_group=self.slam_group
         )
         self.create_subscription(
-            Bool, "/use_planner", self.use_planner_callback, 10
+            Bool, "/use_planner", self.use_planner_callback, 10,
+            callback_group=self.sensor_group
         )
 
         # Publishers
@@ -163,6 +210,7 @@ class PlannerSLAMNode(Node):
         self.goal_point_pub = self.create_publisher(Marker, "/goal_point", 10)
         self.goal_history_pub = self.create_publisher(Marker, "/goal_history", 10)
         self.control_pub = self.create_publisher(Vector3, "/planned_control", 10)
+        self.control_msg = Vector3()  # Reused for every published command
         
         # RRT visualization publishers
         self.rrt_tree_pub = self.create_publisher(Marker, "/rrt_tree", 10)
@@ -170,10 +218,23 @@ class PlannerSLAMNode(Node):
         self.rrt_samples_pub = self.create_publisher(Marker, "/rrt_samples", 10)
         self.entropy_map_pub = self.create_publisher(OccupancyGrid, "/entropy_map", 10)
         self.boundary_map_pub = self.create_publisher(OccupancyGrid, "/boundary_map", 10)
+
+        # Occupancy grid message reused for every publish; only the stamp and data change.
+        # The int8 view shares memory with msg.data so the grid is written in place.
+        self.map_msg = self.create_occupancy_grid_msg()
+        self.map_msg_data = np.frombuffer(self.map_msg.data, dtype=np.int8)
+        self.entropy_map_msg = self.create_occupancy_grid_msg()
+        self.entropy_map_msg_data = np.frombuffer(self.entropy_map_msg.data, dtype=np.int8)
+        self.boundary_map_msg = self.create_occupancy_grid_msg()
+        self.boundary_map_msg_data = np.frombuffer(self.boundary_map_msg.data, dtype=np.int8)
+
+        # Compile the JIT kernels now instead of stalling the first scan and map publish
+        bresenham_lines(np.zeros((1, 2)), np.ones((1, 2)))
+        self.map.get_occupancy_grid(out=self.map_msg_data)
         
         # Timer for visualization
-        self.create_timer(1, self.publish_viz)
-        self.create_timer(0.1, self.publish_planning_status)
+        self.create_timer(1.0 / viz_rate_hz, self.publish_viz, callback_group=self.slam_group)
+        self.create_timer(0.1, self.publish_planning_status, callback_group=self.sensor_group)
         self.sim_done_cb(Bool(data=True))  # Call once to initialize
 
 
@@ -184,9 +245,17 @@ class PlannerSLAMNode(Node):
         This is the main SLAM update loop that runs when the physics simulation
         has completed a step.
         """
+        # Read the clock once so every message published this tick shares a stamp
+        stamp = self.get_clock().now().to_msg()
+
+        # Snapshot the sensor buffers so the whole tick works on one consistent scan
+        with self.sensor_lock:
+            lidar_data, beacon_data = self.lidar_data, self.beacon_data
+            sensor_seq = (self.lidar_seq, self.beacon_seq)
+
         # Localization
         particles, cov, beacon_particles = self.localization.update_position(
-            self.beacon_data,
+            beacon_data,
             self.map
         )
 
@@ -200,16 +269,18 @@ class PlannerSLAMNode(Node):
         # 필요한 경우 beacon_particles 저장
         self.beacon_particles = beacon_particles
         
-        self.map.update(
-            robot_pos=self.position,
-            robot_cov=self.position_cov,
-            lidar_data=self.lidar_data,
-            lidar_range=self.lidar_range,
-            beacon_data=self.beacon_data,
-            beacon_particles=beacon_particles
-        )
-        
-        self.get_logger().info("Updated map.")
+        # Skip the map update while the robot is stationary and no new sensor data has arrived
+        if sensor_seq != self.processed_sensor_seq or np.any(self.control_input != 0):
+            self.map.update(
+                robot_pos=self.position,
+                robot_cov=self.position_cov,
+                lidar_data=lidar_data,
+                lidar_range=self.lidar_range,
+                beacon_data=beacon_data,
+                beacon_particles=beacon_particles
+            )
+            self.processed_sensor_seq = sensor_seq
+            self.get_logger().info("Updated map.")
 
         # Update planner and generate control if enabled
         if self.use_planner and self.planner is not None:
@@ -227,20 +298,19 @@ class PlannerSLAMNode(Node):
                     # 이전 목표 지점이 있으면 기록에 추가
                     if self.goal_point is not None:
                         self.goal_history.append(self.goal_point.copy())
-                        # 최대 기록 개수 제한
-                        if len(self.goal_history) > self.max_goal_history:
-                            self.goal_history.pop(0)  # 가장 오래된 기록 제거
                     
                     # 새 목표 지점 업데이트
                     self.goal_point = new_goal_point
                 
-                # Publish RRT visualization
-                self.publish_rrt_visualization()
-                self.publish_goal_history()
+                # Publish RRT visualization every few steps, it is too heavy for every tick
+                self.rrt_viz_step = (self.rrt_viz_step + 1) % self.rrt_viz_every_n_steps
+                if self.rrt_viz_step == 0:
+                    self.publish_rrt_visualization(stamp)
+                    self.publish_goal_history(stamp)
                 
                 if control_input is not None:
                     # Publish the control input
-                    control_msg = Vector3()
+                    control_msg = self.control_msg
                     control_msg.x = float(control_input[0])
                     control_msg.y = float(control_input[1])
                     control_msg.z = 0.0
@@ -256,43 +326,48 @@ class PlannerSLAMNode(Node):
             self.planning_active = False
 
         # Publish position estimate
-        self.publish_pose_estimate()
+        self.publish_pose_estimate(stamp)
         
         # Publish SLAM results
-        self.publish_particles()
-        self.publish_planned_path()
-        self.publish_goal_point()
+        self.publish_particles(stamp)
+        self.publish_planned_path(stamp)
+        self.publish_goal_point(stamp)
         self.slam_done_pub.publish(Bool(data=True))
 
     def particles_callback(self, msg: PointCloud2):
         """Process particles from visualization."""
-        points = list(read_points(msg, field_names=("x", "y", "z")))
-        self.particles = np.array([np.array([p[0], p[1], p[2]]) for p in points])
+        self.particles = read_points_numpy(msg, field_names=("x", "y", "z"), skip_nans=True)
 
     def publish_viz(self):
         """Publish all visualization messages."""
-        self.publish_pos_viz()
-        self.publish_map_viz()
-        self.publish_beacons_viz()
-        self.publish_planned_path()
-        self.publish_goal_point()
-        self.publish_goal_history()
-        self.publish_rrt_visualization()
+        stamp = self.get_clock().now().to_msg()
+        self.publish_pos_viz(stamp)
+        self.publish_map_viz(stamp)
+        self.publish_beacons_viz(stamp)
+        self.publish_planned_path(stamp)
+        self.publish_goal_point(stamp)
+        self.publish_goal_history(stamp)
+        self.publish_rrt_visualization(stamp)
 
     def lidar_callback(self, msg: PointCloud2):
         """Process LiDAR data."""
-        points = list(read_points(msg, field_names=("x", "y", "z")))
-        self.lidar_data = [np.array([p[0], p[1], p[2]]) for p in points]
+        lidar_data = read_points_numpy(msg, field_names=("x", "y", "z"), skip_nans=True)
+        with self.sensor_lock:
+            self.lidar_data = lidar_data
+            self.lidar_seq += 1
 
     def beacon_callback(self, msg: PointCloud2):
         """Process beacon data."""
-        points = list(read_points(msg, field_names=("x", "y", "z")))
-        self.beacon_data = [np.array([p[0], p[1], p[2]]) for p in points]
+        beacon_data = read_points_numpy(msg, field_names=("x", "y", "z"), skip_nans=True)
+        with self.sensor_lock:
+            self.beacon_data = beacon_data
+            self.beacon_seq += 1
 
     def particles_pred_callback(self, msg: PointCloud2):
         """Process predicted particles from motion model."""
-        points = list(read_points(msg, field_names=("x", "y", "z")))
-        self.localization.particles = [np.array([p[0], p[1], p[2]]) for p in points]
+        self.localization.particles = read_points_numpy(
+            msg, field_names=("x", "y", "z"), skip_nans=True
+        )
 
     def control_callback(self, msg: Vector3):
         """Process control input."""
@@ -308,11 +383,11 @@ class PlannerSLAMNode(Node):
         status_msg = Bool(data=self.planning_active)
         self.planning_status_pub.publish(status_msg)
 
-    def publish_pose_estimate(self):
+    def publish_pose_estimate(self, stamp):
         """Publish the current position estimate as a PoseStamped message."""
         pose_msg = PoseStamped()
         pose_msg.header.frame_id = "map"
-        pose_msg.header.stamp = self.get_clock().now().to_msg()
+        pose_msg.header.stamp = stamp
         
         pose_msg.pose.position.x = float(self.position[0])
         pose_msg.pose.position.y = float(self.position[1])
@@ -323,21 +398,21 @@ class PlannerSLAMNode(Node):
         
         self.pose_estimate_pub.publish(pose_msg)
 
-    def publish_particles(self):
+    def publish_particles(self, stamp):
         """Publish particle filter state."""
         particles = self.localization.particles
 
         header = Header()
-        header.stamp = self.get_clock().now().to_msg()
+        header.stamp = stamp
         header.frame_id = "map"
         particles_msg = point_cloud2.create_cloud_xyz32(header, particles)
         self.particles_pub.publish(particles_msg)
 
-    def publish_pos_viz(self):
+    def publish_pos_viz(self, stamp):
         """Publish the estimated pose visualization marker."""
         marker = Marker()
         marker.header.frame_id = "map"
-        marker.header.stamp = self.get_clock().now().to_msg()
+        marker.header.stamp = stamp
         marker.ns = "pos_hat_viz"
         marker.id = 0
         marker.type = Marker.SPHERE
@@ -361,69 +436,75 @@ class PlannerSLAMNode(Node):
         
         self.pose_pub.publish(marker)
 
-    def publish_map_viz(self):
-        """Publish occupancy grid for visualization."""
-        # Create occupancy grid message
+    def create_occupancy_grid_msg(self):
+        """Create an OccupancyGrid message with the map metadata and a zeroed data buffer."""
         msg = OccupancyGrid()
-        msg.header.stamp = self.get_clock().now().to_msg()
         msg.header.frame_id = "map"
         msg.info.map_load_time = self.get_clock().now().to_msg()
         msg.info.resolution = self.map.grid_size
         msg.info.width = self.map.grid_width
         msg.info.height = self.map.grid_height
-        
+
         # Set origin (position and orientation)
         msg.info.origin.position.x = self.map.map_origin[0]
         msg.info.origin.position.y = self.map.map_origin[1]
-        
-        # Convert log-odds to probabilities (0-100)
-        probs = self.map.get_prob_grid()
-        msg.data = (probs * 100).astype(int).flatten().tolist()
-        
-        self.map_pub.publish(msg)
 
-    def publish_beacons_viz(self):
+        msg.data = array.array('b', bytes(self.map.grid_width * self.map.grid_height))
+        return msg
+
+    def publish_map_viz(self, stamp):
+        """Publish occupancy grid for visualization."""
+        self.map_msg.header.stamp = stamp
+
+        # Convert log-odds to probabilities (0-100) straight into the message buffer
+        self.map.get_occupancy_grid(out=self.map_msg_data)
+
+        self.map_pub.publish(self.map_msg)
+
+    def publish_beacons_viz(self, stamp):
         """Publish estimated beacon positions for visualization."""
-        marker_array = MarkerArray()
-        
         for i, (beacon_pos, beacon_cov) in enumerate(zip(self.map.beacon_positions, self.map.beacon_covariances)):
-            marker = Marker()
-            marker.header.frame_id = "map"
-            marker.header.stamp = self.get_clock().now().to_msg()
-            marker.ns = "estimated_beacons"
-            marker.id = i
-            marker.type = Marker.SPHERE
-            marker.action = Marker.ADD
-            
+            if i == len(self.beacon_markers):
+                # Fields that never change are only set when the marker is created
+                marker = Marker()
+                marker.header.frame_id = "map"
+                marker.ns = "estimated_beacons"
+                marker.id = i
+                marker.type = Marker.SPHERE
+                marker.action = Marker.ADD
+                marker.pose.position.z = 0.0  # 2D
+                marker.scale.z = 0.2  # Fixed height
+
+                # Color - blue for beacons
+                marker.color.r = 0.0
+                marker.color.g = 0.0
+                marker.color.b = 1.0
+                marker.color.a = 0.7
+                self.beacon_markers.append(marker)
+
+            marker = self.beacon_markers[i]
+            marker.header.stamp = stamp
+
             # Position
             marker.pose.position.x = beacon_pos[0]
             marker.pose.position.y = beacon_pos[1]
-            marker.pose.position.z = 0.0  # 2D
-            
+
             # Scale - represent uncertainty with size
             uncertainty = np.sqrt(np.trace(beacon_cov[:2, :2]))
             marker.scale.x = max(0.2, min(1.0, uncertainty))
             marker.scale.y = max(0.2, min(1.0, uncertainty))
-            marker.scale.z = 0.2  # Fixed height
-            
-            # Color - blue for beacons
-            marker.color.r = 0.0
-            marker.color.g = 0.0
-            marker.color.b = 1.0
-            marker.color.a = 0.7
-            
-            marker_array.markers.append(marker)
-            
+
+        marker_array = MarkerArray(markers=self.beacon_markers[:len(self.map.beacon_positions)])
         self.beacon_pub.publish(marker_array)
 
-    def publish_planned_path(self):
+    def publish_planned_path(self, stamp):
         """Publish the planned path for visualization."""
         if not self.current_path or len(self.current_path) < 2:
             return
             
         marker = Marker()
         marker.header.frame_id = "map"
-        marker.header.stamp = self.get_clock().now().to_msg()
+        marker.header.stamp = stamp
         marker.ns = "planned_path"
         marker.id = 0
         marker.type = Marker.LINE_STRIP
@@ -448,19 +529,18 @@ class PlannerSLAMNode(Node):
         
         self.planned_path_pub.publish(marker)
 
-    def publish_goal_point(self):
+    def publish_goal_point(self, stamp):
         """Publish the goal point for visualization."""
         if self.goal_point is None:
             return
         
         # 현재 시간을 텍스트로 표시하기 위해 가져옵니다
-        current_time = self.get_clock().now()
-        time_str = f"{current_time.seconds_nanoseconds()[0]}"
+        time_str = f"{stamp.sec}"
         
         # 1. 목표 지점 구체 마커 (더 크고 밝은 색상)
         sphere_marker = Marker()
         sphere_marker.header.frame_id = "map"
-        sphere_marker.header.stamp = current_time.to_msg()
+        sphere_marker.header.stamp = stamp
         sphere_marker.ns = "goal_point"
         sphere_marker.id = 0
         sphere_marker.type = Marker.SPHERE
@@ -487,7 +567,7 @@ class PlannerSLAMNode(Node):
         # 2. 목표 지점 화살표 마커 (위를 향하는 큰 화살표)
         arrow_marker = Marker()
         arrow_marker.header.frame_id = "map"
-        arrow_marker.header.stamp = current_time.to_msg()
+        arrow_marker.header.stamp = stamp
         arrow_marker.ns = "goal_point_arrow"
         arrow_marker.id = 1
         arrow_marker.type = Marker.ARROW
@@ -520,7 +600,7 @@ class PlannerSLAMNode(Node):
         # 3. 목표 지점 텍스트 마커 (좌표와 시간 표시)
         text_marker = Marker()
         text_marker.header.frame_id = "map"
-        text_marker.header.stamp = current_time.to_msg()
+        text_marker.header.stamp = stamp
         text_marker.ns = "goal_point_text"
         text_marker.id = 2
         text_marker.type = Marker.TEXT_VIEW_FACING
@@ -545,32 +625,32 @@ class PlannerSLAMNode(Node):
         
         self.goal_point_pub.publish(text_marker)
 
-    def publish_rrt_visualization(self):
+    def publish_rrt_visualization(self, stamp):
         """Publish visualizations of the RRT planning process."""
         if not self.use_planner or self.planner is None:
             return
             
         # RRT Tree - edge connections
-        self.publish_rrt_tree()
+        self.publish_rrt_tree(stamp)
         
         # RRT Nodes - vertices
-        self.publish_rrt_nodes()
+        self.publish_rrt_nodes(stamp)
         
         # RRT Samples - random samples that were considered during planning
-        self.publish_rrt_samples()
+        self.publish_rrt_samples(stamp)
         
         # Entropy and boundary maps
-        self.publish_entropy_map()
-        self.publish_boundary_map()
+        self.publish_entropy_map(stamp)
+        self.publish_boundary_map(stamp)
     
-    def publish_rrt_tree(self):
+    def publish_rrt_tree(self, stamp):
         """Publish RRT tree edges as line list."""
         if not hasattr(self.planner, 'rrt_edges') or not self.planner.rrt_edges:
             return
             
         marker = Marker()
         marker.header.frame_id = "map"
-        marker.header.stamp = self.get_clock().now().to_msg()
+        marker.header.stamp = stamp
         marker.ns = "rrt_tree"
         marker.id = 0
         marker.type = Marker.LINE_LIST
@@ -602,14 +682,14 @@ class PlannerSLAMNode(Node):
         
         self.rrt_tree_pub.publish(marker)
     
-    def publish_rrt_nodes(self):
+    def publish_rrt_nodes(self, stamp):
         """Publish RRT nodes as points."""
         if not hasattr(self.planner, 'rrt_nodes') or not self.planner.rrt_nodes:
             return
             
         marker = Marker()
         marker.header.frame_id = "map"
-        marker.header.stamp = self.get_clock().now().to_msg()
+        marker.header.stamp = stamp
         marker.ns = "rrt_nodes"
         marker.id = 0
         marker.type = Marker.POINTS
@@ -635,14 +715,14 @@ class PlannerSLAMNode(Node):
         
         self.rrt_nodes_pub.publish(marker)
     
-    def publish_rrt_samples(self):
+    def publish_rrt_samples(self, stamp):
         """Publish random samples used during RRT planning."""
         if not hasattr(self.planner, 'rrt_samples') or not self.planner.rrt_samples:
             return
             
         marker = Marker()
         marker.header.frame_id = "map"
-        marker.header.stamp = self.get_clock().now().to_msg()
+        marker.header.stamp = stamp
         marker.ns = "rrt_samples"
         marker.id = 0
         marker.type = Marker.POINTS
@@ -668,67 +748,45 @@ class PlannerSLAMNode(Node):
         
         self.rrt_samples_pub.publish(marker)
     
-    def publish_entropy_map(self):
+    def publish_entropy_map(self, stamp):
         """Publish entropy map visualization."""
         if not hasattr(self.planner, 'entropy_map') or self.planner.entropy_map is None:
             return
             
-        msg = OccupancyGrid()
-        msg.header.stamp = self.get_clock().now().to_msg()
-        msg.header.frame_id = "map"
-        msg.info.map_load_time = self.get_clock().now().to_msg()
-        msg.info.resolution = self.map.grid_size
-        msg.info.width = self.map.grid_width
-        msg.info.height = self.map.grid_height
-        
-        # Set origin
-        msg.info.origin.position.x = self.map.map_origin[0]
-        msg.info.origin.position.y = self.map.map_origin[1]
-        
-        # Scale entropy values to 0-100 range for visualization
-        entropy_scaled = (self.planner.entropy_map * 100).astype(int)
-        msg.data = entropy_scaled.flatten().tolist()
-        
-        self.entropy_map_pub.publish(msg)
+        self.entropy_map_msg.header.stamp = stamp
+
+        # Scale entropy values to 0-100 range for visualization, written into the message buffer
+        self.entropy_map_msg_data[:] = (self.planner.entropy_map * 100).ravel()
+
+        self.entropy_map_pub.publish(self.entropy_map_msg)
     
-    def publish_boundary_map(self):
+    def publish_boundary_map(self, stamp):
         """Publish boundary map visualization."""
         if not hasattr(self.planner, 'boundary_map') or self.planner.boundary_map is None:
             return
             
-        msg = OccupancyGrid()
-        msg.header.stamp = self.get_clock().now().to_msg()
-        msg.header.frame_id = "map"
-        msg.info.map_load_time = self.get_clock().now().to_msg()
-        msg.info.resolution = self.map.grid_size
-        msg.info.width = self.map.grid_width
-        msg.info.height = self.map.grid_height
-        
-        # Set origin
-        msg.info.origin.position.x = self.map.map_origin[0]
-        msg.info.origin.position.y = self.map.map_origin[1]
-        
-        # Scale boundary values to 0-100 range for visualization
-        boundary_scaled = (self.planner.boundary_map * 100).astype(int)
-        msg.data = boundary_scaled.flatten().tolist()
-        
-        self.boundary_map_pub.publish(msg)
+        self.boundary_map_msg.header.stamp = stamp
+
+        # Scale boundary values to 0-100 range for visualization, written into the message buffer
+        self.boundary_map_msg_data[:] = (self.planner.boundary_map * 100).ravel()
+
+        self.boundary_map_pub.publish(self.boundary_map_msg)
 
     # 목표 지점 궤적 시각화 메서드 추가
-    def publish_goal_history(self):
+    def publish_goal_history(self, stamp):
         """Publish history of goal points as a line strip visualization."""
         if not self.goal_history or len(self.goal_history) < 1:
             return
             
         # 현재 목표 지점을 포함한 전체 궤적 생성
-        full_history = self.goal_history.copy()
+        full_history = list(self.goal_history)
         if self.goal_point is not None:
             full_history.append(self.goal_point)
             
         # 목표 궤적을 LINE_STRIP으로 표시
         marker = Marker()
         marker.header.frame_id = "map"
-        marker.header.stamp = self.get_clock().now().to_msg()
+        marker.header.stamp = stamp
         marker.ns = "goal_history"
         marker.id = 0
         marker.type = Marker.LINE_STRIP
@@ -756,7 +814,7 @@ class PlannerSLAMNode(Node):
         # 각 궤적 지점을 작은 구체로 표시
         points_marker = Marker()
         points_marker.header.frame_id = "map"
-        points_marker.header.stamp = self.get_clock().now().to_msg()
+        points_marker.header.stamp = stamp
         points_marker.ns = "goal_history_points"
         points_marker.id = 1
         points_marker.type = Marker.SPHERE_LIST
@@ -789,7 +847,9 @@ def main(args=None):
     rclpy.init(args=args)
     node = PlannerSLAMNode()
     node.get_logger().info("Planner SLAM node started")
-    rclpy.spin(node)
+    executor = MultiThreadedExecutor(num_threads=4)
+    executor.add_node(node)
+    executor.spin()
     node.destroy_node()
     rclpy.shutdown()
 
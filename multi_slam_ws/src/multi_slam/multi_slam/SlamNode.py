@@ -1,17 +1,22 @@
 # slam_node.py
+import array
+import threading
 import rclpy
 from rclpy.node import Node
+from rclpy.callback_groups import MutuallyExclusiveCallbackGroup
+from rclpy.executors import MultiThreadedExecutor
+from rclpy.qos import HistoryPolicy, QoSProfile, ReliabilityPolicy
 from sensor_msgs.msg import PointCloud2
 from geometry_msgs.msg import Vector3
 from nav_msgs.msg import OccupancyGrid
 from visualization_msgs.msg import Marker, MarkerArray
 from multi_slam.Localization import Localization
 from multi_slam.Mapping import Mapping
+from multi_slam._fast import bresenham_lines
 import numpy as np
 from sensor_msgs_py import point_cloud2
 from std_msgs.msg import Header, Bool
-from sensor_msgs_py.point_cloud2 import read_points
-from multi_slam.Planner import Planner
+from sensor_msgs_py.point_cloud2 import read_points_numpy
 from geometry_msgs.msg import Point
 from multi_slam.Map import MAP
 
@@ -79,28 +84,57 @@ class SLAMNode(Node):
         self.lidar_range = (0.1, 10.0)  # min and max range in meters
 
         # Current data
-        self.lidar_data = []
-        self.beacon_data = []
+        self.lidar_data = np.empty((0, 3), dtype=np.float32)
+        self.beacon_data = np.empty((0, 3), dtype=np.float32)
         self.control_input = np.zeros(3)  # vx, vy, 0
+        self.lidar_seq = 0
+        self.beacon_seq = 0
+        self.processed_sensor_seq = None
         self.pos_hat_new = np.array([0.0, 0.0, 0.0])
         self.particles = None
         self.sim_done = True
 
+        # Marker pools reused across visualization calls, one marker per beacon
+        self.beacon_markers = []
+        self.beacon_by_particle_markers = []
+
+        # Sensor ingest only swaps buffers, so it may run alongside the SLAM update.
+        # Each sensor gets its own group so its callback never runs concurrently with itself.
+        # The SLAM update and visualization share the map and must not interleave.
+        self.lidar_group = MutuallyExclusiveCallbackGroup()
+        self.beacon_group = MutuallyExclusiveCallbackGroup()
+        self.sensor_group = MutuallyExclusiveCallbackGroup()
+        self.slam_group = MutuallyExclusiveCallbackGroup()
+        # Guards each sensor buffer together with its sequence number
+        self.sensor_lock = threading.Lock()
+
+        # Only the latest scan matters, so drop stale sensor messages instead of queueing them
+        sensor_qos = QoSProfile(
+            reliability=ReliabilityPolicy.BEST_EFFORT,
+            history=HistoryPolicy.KEEP_LAST,
+            depth=1
+        )
+
         # Subscribers
         self.create_subscription(
-            PointCloud2, "/lidar", self.lidar_callback, 10
+            PointCloud2, "/lidar", self.lidar_callback, sensor_qos,
+            callback_group=self.lidar_group
         )
         self.create_subscription(
-            PointCloud2, "/beacon", self.beacon_callback, 10
+            PointCloud2, "/beacon", self.beacon_callback, sensor_qos,
+            callback_group=self.beacon_group
         )
         self.create_subscription(
-            Vector3, "/control_signal", self.control_callback, 10
+            Vector3, "/control_signal", self.control_callback, 10,
+            callback_group=self.sensor_group
         )
         self.create_subscription(
-            PointCloud2, "/particles_pred", self.particles_pred_callback, 10
+            PointCloud2, "/particles_pred", self.particles_pred_callback, 10,
+            callback_group=self.slam_group
         )
         self.sim_done_sub = self.create_subscription(
-            Bool, "/sim_done", self.sim_done_cb, 10
+            Bool, "/sim_done", self.sim_done_cb, 10,
+            callback_group=self.slam_group
         )
 
         # Publishers
@@ -116,8 +150,17 @@ class SLAMNode(Node):
         # Publisher for Experiment Particle vs. Kalman Update Comparison
         self.particle_vs_kalman_pub = self.create_publisher(Marker, "/particle_vs_kalman", 10)
 
+        # Occupancy grid message reused for every publish; only the stamp and data change.
+        # The int8 view shares memory with msg.data so the grid is written in place.
+        self.map_msg = self.create_occupancy_grid_msg()
+        self.map_msg_data = np.frombuffer(self.map_msg.data, dtype=np.int8)
+
+        # Compile the JIT kernels now instead of stalling the first scan and map publish
+        bresenham_lines(np.zeros((1, 2)), np.ones((1, 2)))
+        self.map.get_occupancy_grid(out=self.map_msg_data)
+
         # Timer for visualization
-        self.create_timer(1, self.publish_viz)
+        self.create_timer(1, self.publish_viz, callback_group=self.slam_group)
         self.sim_done_cb(Bool(data=True))  # Call once to initialize
 
 
@@ -128,9 +171,17 @@ class SLAMNode(Node):
         This is the main SLAM update loop that runs when the physics simulation
         has completed a step.
         """
+        # Read the clock once so every message published this tick shares a stamp
+        stamp = self.get_clock().now().to_msg()
+
+        # Snapshot the sensor buffers so the whole tick works on one consistent scan
+        with self.sensor_lock:
+            lidar_data, beacon_data = self.lidar_data, self.beacon_data
+            sensor_seq = (self.lidar_seq, self.beacon_seq)
+
         # Localization
         particles, cov, beacon_particles = self.localization.update_position(
-            self.beacon_data,
+            beacon_data,
             self.map
         )
 
@@ -142,14 +193,17 @@ class SLAMNode(Node):
         self.position = self.pos_hat_new
         self.position_cov = cov
 
-        self.map.update(
-            robot_pos=self.position,
-            robot_cov=self.position_cov,
-            lidar_data=self.lidar_data,
-            lidar_range=self.lidar_range,
-            beacon_data=self.beacon_data,
-            beacon_particles=self.localization.beacon_particles
-        )
+        # Skip the map update while the robot is stationary and no new sensor data has arrived
+        if sensor_seq != self.processed_sensor_seq or np.any(self.control_input != 0):
+            self.map.update(
+                robot_pos=self.position,
+                robot_cov=self.position_cov,
+                lidar_data=lidar_data,
+                lidar_range=self.lidar_range,
+                beacon_data=beacon_data,
+                beacon_particles=self.localization.beacon_particles
+            )
+            self.processed_sensor_seq = sensor_seq
 
         # self.get_logger().info("Updated map.")
 
@@ -159,25 +213,25 @@ class SLAMNode(Node):
         # goal = self.planner.select_goal_point()
         # self.get_logger().info(f"Goal: {goal}")
 
-        self.publish_particles()
-        self.publish_particle_vs_kalman_viz()
+        self.publish_particles(stamp)
+        self.publish_particle_vs_kalman_viz(stamp)
         self.slam_done_pub.publish(Bool(data=True))
 
     def particles_callback(self, msg: PointCloud2):
         """Process particles from visualization."""
-        points = list(read_points(msg, field_names=("x", "y", "z")))
-        self.particles = np.array([np.array([p[0], p[1], p[2]]) for p in points])
+        self.particles = read_points_numpy(msg, field_names=("x", "y", "z"), skip_nans=True)
 
     def publish_viz(self):
         """Publish all visualization messages."""
-        self.publish_pos_viz()
-        self.publish_map_viz()
-        self.publish_beacons_viz()
-        self.publish_beacons_by_particle_viz()
-        self.publish_beacon_particles_viz()
-        self.publish_total_beacon_particles_viz()
-
-    def publish_particle_vs_kalman_viz(self):
+        stamp = self.get_clock().now().to_msg()
+        self.publish_pos_viz(stamp)
+        self.publish_map_viz(stamp)
+        self.publish_beacons_viz(stamp)
+        self.publish_beacons_by_particle_viz(stamp)
+        self.publish_beacon_particles_viz(stamp)
+        self.publish_total_beacon_particles_viz(stamp)
+
+    def publish_particle_vs_kalman_viz(self, stamp):
         """Publish particle vs. kalman MSE comparison for recording."""
 
         if len(self.map.average_beacon_positions_by_particle) != 0 and len(self.map.beacon_positions) != 0:
@@ -196,7 +250,7 @@ class SLAMNode(Node):
 
             marker = Marker()
             marker.header.frame_id = "map"
-            marker.header.stamp = self.get_clock().now().to_msg()
+            marker.header.stamp = stamp
 
             # Store MSEs in the scale field
             marker.scale.x = particle_mse
@@ -206,38 +260,43 @@ class SLAMNode(Node):
 
     def lidar_callback(self, msg: PointCloud2):
         """Process LiDAR data."""
-        points = list(read_points(msg, field_names=("x", "y", "z")))
-        self.lidar_data = [np.array([p[0], p[1], p[2]]) for p in points]
+        lidar_data = read_points_numpy(msg, field_names=("x", "y", "z"), skip_nans=True)
+        with self.sensor_lock:
+            self.lidar_data = lidar_data
+            self.lidar_seq += 1
 
     def beacon_callback(self, msg: PointCloud2):
         """Process beacon data."""
-        points = list(read_points(msg, field_names=("x", "y", "z")))
-        self.beacon_data = [np.array([p[0], p[1], p[2]]) for p in points]
+        beacon_data = read_points_numpy(msg, field_names=("x", "y", "z"), skip_nans=True)
+        with self.sensor_lock:
+            self.beacon_data = beacon_data
+            self.beacon_seq += 1
 
     def particles_pred_callback(self, msg: PointCloud2):
         """Process predicted particles from motion model."""
-        points = list(read_points(msg, field_names=("x", "y", "z")))
-        self.localization.particles = [np.array([p[0], p[1], p[2]]) for p in points]
+        self.localization.particles = read_points_numpy(
+            msg, field_names=("x", "y", "z"), skip_nans=True
+        )
 
     def control_callback(self, msg: Vector3):
         """Process control input."""
         self.control_input = np.array([msg.x, msg.y, msg.z])
 
-    def publish_particles(self):
+    def publish_particles(self, stamp):
         """Publish particle filter state."""
         particles = self.localization.particles
 
         header = Header()
-        header.stamp = self.get_clock().now().to_msg()
+        header.stamp = stamp
         header.frame_id = "map"
         particles_msg = point_cloud2.create_cloud_xyz32(header, particles)
         self.position_particles_pub.publish(particles_msg)
 
-    def publish_pos_viz(self):
+    def publish_pos_viz(self, stamp):
         """Publish the estimated pose visualization marker."""
         marker = Marker()
         marker.header.frame_id = "map"
-        marker.header.stamp = self.get_clock().now().to_msg()
+        marker.header.stamp = stamp
         marker.ns = "pos_hat_viz"
         marker.id = 0
         marker.type = Marker.SPHERE
@@ -261,11 +320,9 @@ class SLAMNode(Node):
 
         self.pose_pub.publish(marker)
 
-    def publish_map_viz(self):
-        """Publish occupancy grid for visualization."""
-        # Create occupancy grid message
+    def create_occupancy_grid_msg(self):
+        """Create an OccupancyGrid message with the map metadata and a zeroed data buffer."""
         msg = OccupancyGrid()
-        msg.header.stamp = self.get_clock().now().to_msg()
         msg.header.frame_id = "map"
         msg.info.map_load_time = self.get_clock().now().to_msg()
         msg.info.resolution = self.map.grid_size
@@ -276,83 +333,104 @@ class SLAMNode(Node):
         msg.info.origin.position.x = self.map.map_origin[0]
         msg.info.origin.position.y = self.map.map_origin[1]
 
-        # Convert log-odds to probabilities (0-100)
-        probs = self.map.get_prob_grid()
-        msg.data = (probs * 100).astype(int).flatten().tolist()
+        msg.data = array.array('b', bytes(self.map.grid_width * self.map.grid_height))
+        return msg
 
-        self.map_pub.publish(msg)
+    def publish_map_viz(self, stamp):
+        """Publish occupancy grid for visualization."""
+        self.map_msg.header.stamp = stamp
 
-    def publish_beacons_viz(self):
+        # Convert log-odds to probabilities (0-100) straight into the message buffer
+        self.map.get_occupancy_grid(out=self.map_msg_data)
+
+        self.map_pub.publish(self.map_msg)
+
+    def publish_beacons_viz(self, stamp):
         """Publish estimated beacon positions of beacon particles for visualization."""
-        marker_array = MarkerArray()
+        uncertainties = np.sqrt(self._xy_covariance_dets(self.map.beacon_covariances))
 
-        for i, (beacon_pos, beacon_cov) in enumerate(zip(self.map.beacon_positions, self.map.beacon_covariances)):
-            marker = Marker()
-            marker.header.frame_id = "map"
-            marker.header.stamp = self.get_clock().now().to_msg()
-            marker.ns = "beacons"
-            marker.id = i
-            marker.type = Marker.SPHERE
-            marker.action = Marker.ADD
+        beacons = zip(self.map.beacon_positions, uncertainties)
+        for i, (beacon_pos, uncertainty) in enumerate(beacons):
+            if i == len(self.beacon_markers):
+                # Fields that never change are only set when the marker is created
+                marker = Marker()
+                marker.header.frame_id = "map"
+                marker.ns = "beacons"
+                marker.id = i
+                marker.type = Marker.SPHERE
+                marker.action = Marker.ADD
+                marker.pose.position.z = 0.1
+
+                # Maroon
+                marker.color.r = 0.8
+                marker.color.g = 0.10
+                marker.color.b = 0.0
+                marker.color.a = 1.0  # Opaque
+                self.beacon_markers.append(marker)
+
+            marker = self.beacon_markers[i]
+            marker.header.stamp = stamp
 
             # Position
             marker.pose.position.x = beacon_pos[0]
             marker.pose.position.y = beacon_pos[1]
-            marker.pose.position.z = 0.1
 
             # Bigger scale
-            uncertainty = np.sqrt(np.linalg.det(beacon_cov))
             scale = max(0.25, min(1.25, uncertainty * 1.25))
             marker.scale.x = scale
             marker.scale.y = scale
             marker.scale.z = scale
 
-            # Maroon
-            marker.color.r = 0.8
-            marker.color.g = 0.10
-            marker.color.b = 0.0
-            marker.color.a = 1.0  # Opaque
-
-            marker_array.markers.append(marker)
-
+        marker_array = MarkerArray(markers=self.beacon_markers[:len(uncertainties)])
         self.beacon_pub.publish(marker_array)
 
-    def publish_beacons_by_particle_viz(self):
+    def publish_beacons_by_particle_viz(self, stamp):
         """Publish estimated beacon positions of beacon particles for visualization."""
-        marker_array = MarkerArray()
+        uncertainties = np.sqrt(self._xy_covariance_dets(self.map.beacon_covariances_by_particle))
 
-        for i, (beacon_pos, beacon_cov) in enumerate(zip(self.map.average_beacon_positions_by_particle, self.map.beacon_covariances_by_particle)):
-            marker = Marker()
-            marker.header.frame_id = "map"
-            marker.header.stamp = self.get_clock().now().to_msg()
-            marker.ns = "beacons"
-            marker.id = i
-            marker.type = Marker.SPHERE
-            marker.action = Marker.ADD
+        beacons = zip(self.map.average_beacon_positions_by_particle, uncertainties)
+        for i, (beacon_pos, uncertainty) in enumerate(beacons):
+            if i == len(self.beacon_by_particle_markers):
+                # Fields that never change are only set when the marker is created
+                marker = Marker()
+                marker.header.frame_id = "map"
+                marker.ns = "beacons"
+                marker.id = i
+                marker.type = Marker.SPHERE
+                marker.action = Marker.ADD
+                marker.pose.position.z = 0.1
+
+                # Deep Burgundy
+                marker.color.r = 0.0
+                marker.color.g = 0.25
+                marker.color.b = 0.5
+                marker.color.a = 1.0
+                self.beacon_by_particle_markers.append(marker)
+
+            marker = self.beacon_by_particle_markers[i]
+            marker.header.stamp = stamp
 
             # Position
             marker.pose.position.x = beacon_pos[0]
             marker.pose.position.y = beacon_pos[1]
-            marker.pose.position.z = 0.1
 
             # Bigger scale
-            uncertainty = np.sqrt(np.linalg.det(beacon_cov))
             scale = max(0.25, min(1.5, uncertainty * 1.5))
             marker.scale.x = scale
             marker.scale.y = scale
             marker.scale.z = scale
 
-            # Deep Burgundy
-            marker.color.r = 0.0
-            marker.color.g = 0.25
-            marker.color.b = 0.5
-            marker.color.a = 1.0
-
-            marker_array.markers.append(marker)
-
+        marker_array = MarkerArray(markers=self.beacon_by_particle_markers[:len(uncertainties)])
         self.beacon_by_particle_pub.publish(marker_array)
 
-    def publish_total_beacon_particles_viz(self):
+    @staticmethod
+    def _xy_covariance_dets(covariances):
+        """Closed-form determinants of the x-y blocks of a stack of 3x3 covariances."""
+        covariances = np.reshape(covariances, (-1, 3, 3))
+        return (covariances[:, 0, 0] * covariances[:, 1, 1]
+                - covariances[:, 0, 1] * covariances[:, 1, 0])
+
+    def publish_total_beacon_particles_viz(self, stamp):
         """Publish total beacon particles as a marker array of point clouds"""
 
         if self.map.total_beacon_particles is not None:
@@ -360,7 +438,7 @@ class SLAMNode(Node):
 
             for i, beacon_particle_set in enumerate(self.map.total_beacon_particles):
                 marker = Marker()
-                marker.header.stamp = self.get_clock().now().to_msg()
+                marker.header.stamp = stamp
                 marker.header.frame_id = "map"
                 marker.ns = f"beacon_{i}_total_particles"
                 marker.id = i
@@ -387,14 +465,14 @@ class SLAMNode(Node):
             # Publish the actual data
             self.total_beacon_particles_pub.publish(marker_array)
 
-    def publish_beacon_particles_viz(self):
+    def publish_beacon_particles_viz(self, stamp):
         """Publish beacon particles as a marker array of point clouds"""
         # Start with fresh empty array every time
         marker_array = MarkerArray()
 
         # First, add a marker to clear everything
         clear_marker = Marker()
-        clear_marker.header.stamp = self.get_clock().now().to_msg()
+        clear_marker.header.stamp = stamp
         clear_marker.header.frame_id = "map"
         clear_marker.action = Marker.DELETEALL
         marker_array.markers.append(clear_marker)
@@ -408,7 +486,7 @@ class SLAMNode(Node):
 
             for i, beacon_particle_set in enumerate(self.localization.beacon_particles):
                 marker = Marker()
-                marker.header.stamp = self.get_clock().now().to_msg()
+                marker.header.stamp = stamp
                 marker.header.frame_id = "map"
                 marker.ns = f"beacon_{i}_particles"
                 marker.id = i
@@ -440,7 +518,9 @@ def main(args=None):
     """Entry point for the SLAM node."""
     rclpy.init(args=args)
     node = SLAMNode()
-    rclpy.spin(node)
+    executor = MultiThreadedExecutor(num_threads=4)
+    executor.add_node(node)
+    executor.spin()
     node.destroy_node()
     rclpy.shutdown()
 
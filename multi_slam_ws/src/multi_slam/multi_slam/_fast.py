@@ -0,0 +1,139 @@
+"""
+Numeric kernels for the mapping hot paths, JIT-compiled with Numba when it is installed.
+
+Numba is detected here only; other modules with JIT kernels import HAS_NUMBA, njit
+and prange from here.
+"""
+from typing import Optional, Tuple
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True, nogil=True)
+    def _lines_kernel(starts: np.ndarray, ends: np.ndarray,
+                      offsets: np.ndarray, cells: np.ndarray):
+        """JIT-compiled bresenham_lines; fills cells[offsets[r]:offsets[r + 1]] for each line r."""
+        for r in prange(starts.shape[0]):
+            k = offsets[r]
+            n = offsets[r + 1] - k
+            if n == 0:
+                continue
+            xs = starts[r, 0]
+            ys = starts[r, 1]
+            xe = ends[r, 0]
+            ye = ends[r, 1]
+            if abs(xe - xs) >= abs(ye - ys):
+                step = 1 if xe > xs else -1
+                slope = (ye - ys) / (xe - xs)
+                for i in range(n):
+                    u = xs + i * step
+                    cells[k + i, 0] = u
+                    cells[k + i, 1] = int(ys + slope * (u + 0.5 - xs))
+            else:
+                step = 1 if ye > ys else -1
+                slope = (xe - xs) / (ye - ys)
+                for i in range(n):
+                    v = ys + i * step
+                    cells[k + i, 0] = int(xs + slope * (v + 0.5 - ys))
+                    cells[k + i, 1] = v
+
+    @njit(parallel=True, cache=True, nogil=True)
+    def _fused_occupancy_kernel(lor_grid: np.ndarray, lor_known: np.ndarray,
+                                lor_grid_guess: np.ndarray, lut: np.ndarray,
+                                clip: float, out: np.ndarray):
+        """JIT-compiled fused_occupancy on flat grids."""
+        scale = (lut.shape[0] - 1) / (2 * clip)
+        for i in prange(lor_grid.shape[0]):
+            value = lor_grid[i] if lor_known[i] else lor_grid_guess[i]
+            value = min(max(value, -clip), clip)
+            out[i] = lut[int((value + clip) * scale + 0.5)]
+
+
+def bresenham_lines(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rasterize many grid lines at once.
+
+    Each line steps one cell at a time along its major axis and excludes its endpoint.
+    Lines that are horizontal, vertical or a single cell yield no cells.
+
+    Args:
+        starts (np.ndarray): An (R, 2) integer array of (x, y) start cells.
+        ends (np.ndarray): An (R, 2) integer array of (x, y) end cells.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: A (K, 2) integer array of the cells of all lines,
+        line by line, and the (R,) number of cells in each line.
+    """
+    starts = np.ascontiguousarray(starts, dtype=np.intp).reshape(-1, 2)
+    ends = np.ascontiguousarray(ends, dtype=np.intp).reshape(-1, 2)
+    dx = ends[:, 0] - starts[:, 0]
+    dy = ends[:, 1] - starts[:, 1]
+    counts = np.where((dx == 0) | (dy == 0), 0, np.maximum(np.abs(dx), np.abs(dy)))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    if HAS_NUMBA:
+        cells = np.empty((offsets[-1], 2), dtype=np.intp)
+        _lines_kernel(starts, ends, offsets, cells)
+        return cells, counts
+
+    # Expand every line to its cells and step along the major axis of each
+    line = np.repeat(np.arange(len(counts)), counts)
+    i = np.arange(offsets[-1]) - offsets[line]
+    xs, ys = starts[line, 0], starts[line, 1]
+    xe, ye = ends[line, 0], ends[line, 1]
+    x_major = np.abs(xe - xs) >= np.abs(ye - ys)
+
+    cells = np.empty((offsets[-1], 2), dtype=np.intp)
+    u = xs[x_major] + i[x_major] * np.sign(xe[x_major] - xs[x_major])
+    slope = (ye[x_major] - ys[x_major]) / (xe[x_major] - xs[x_major])
+    cells[x_major, 0] = u
+    cells[x_major, 1] = (ys[x_major] + slope * (u + 0.5 - xs[x_major])).astype(np.intp)
+
+    y_major = ~x_major
+    v = ys[y_major] + i[y_major] * np.sign(ye[y_major] - ys[y_major])
+    slope = (xe[y_major] - xs[y_major]) / (ye[y_major] - ys[y_major])
+    cells[y_major, 0] = (xs[y_major] + slope * (v + 0.5 - ys[y_major])).astype(np.intp)
+    cells[y_major, 1] = v
+    return cells, counts
+
+
+def fused_occupancy(lor_grid: np.ndarray, lor_known: np.ndarray, lor_grid_guess: np.ndarray,
+                    lut: np.ndarray, clip: float, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert measured and guessed log-odds grids to occupancy values in a single pass.
+
+    Known cells take their value from lor_grid and unknown cells from lor_grid_guess,
+    without materializing the combined log-odds grid.
+
+    Args:
+        lor_grid (np.ndarray): The measured log-odds grid.
+        lor_known (np.ndarray): Nonzero where a cell has been observed.
+        lor_grid_guess (np.ndarray): The guessed log-odds grid.
+        lut (np.ndarray): Occupancy values sampled evenly over [-clip, clip].
+        clip (float): Log-odds magnitude beyond which cells saturate.
+        out (np.ndarray): Optional flat array to write the result into.
+
+    Returns:
+        np.ndarray: The flattened occupancy grid, with the dtype of lut.
+    """
+    lor_grid = lor_grid.ravel()
+    if out is None:
+        out = np.empty(lor_grid.shape, dtype=lut.dtype)
+
+    if HAS_NUMBA:
+        _fused_occupancy_kernel(lor_grid, lor_known.ravel(), lor_grid_guess.ravel(),
+                                lut, clip, out)
+        return out
+
+    # Quantize the clipped log-odds into LUT indices instead of evaluating exp per cell.
+    # Work in float64 like the kernel so both backends round to the same entries.
+    log_odds = np.where(lor_known.ravel(), lor_grid, lor_grid_guess.ravel()).astype(np.float64)
+    scale = (len(lut) - 1) / (2 * clip)
+    idx = ((np.clip(log_odds, -clip, clip) + clip) * scale + 0.5).astype(np.intp)
+    return np.take(lut, idx, out=out)
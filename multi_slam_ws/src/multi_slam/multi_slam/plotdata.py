@@ -14,7 +14,7 @@ from visualization_msgs.msg import MarkerArray
 from sensor_msgs.msg import PointCloud2
 import rosbag2_py
 from rclpy.time import Time
-from sensor_msgs_py.point_cloud2 import read_points
+from sensor_msgs_py.point_cloud2 import read_points_numpy
 
 class PlotData:
     def __init__(self, bag_path):
@@ -93,12 +93,10 @@ class PlotData:
                 msg = deserialize_message(data, msg_type)
                 
                 # Extract points from the point cloud
-                particles = []
-                for point in read_points(msg, field_names=("x", "y", "z")):
-                    particles.append([point[0], point[1], point[2]])
+                particles = read_points_numpy(msg, field_names=("x", "y", "z"), skip_nans=True)
                 
                 self.timestamps[topic_name].append(timestamp)
-                self.particles.append(np.array(particles))
+                self.particles.append(particles)
         
         # Convert lists to numpy arrays for easier handling
         self.true_positions = np.array(self.true_positions)
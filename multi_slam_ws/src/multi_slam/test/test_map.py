@@ -0,0 +1,93 @@
+import math
+
+from multi_slam import _fast
+from multi_slam import Map as map_module
+from multi_slam.Map import Map
+import numpy as np
+import pytest
+from shapely.geometry import LineString, Point, Polygon
+
+DELTA_THETA = 3
+R_MAX = 10.0
+R_MIN = 0.1
+
+numba_backends = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not _fast.HAS_NUMBA,
+                                                reason='Numba not installed')),
+]
+
+
+def build_mixed_map(map_cls):
+    """Build a map with square, triangle and circle obstacles."""
+    mixed_map = map_cls(-15, -15, 15, 15)
+    for x, y in [(12, -10), (-7, 8), (3, 13), (-13, -5), (0, 0.5)]:
+        mixed_map._add_beacon(Point(x, y))
+    for cx, cy, side in [(-9, -11, 3), (6, -5, 4), (11, 7, 2.5), (-3, 10, 5), (0, -7, 2)]:
+        h = side / 2
+        mixed_map._add_obstacle(Polygon([
+            (cx - h, cy - h), (cx + h, cy - h), (cx + h, cy + h), (cx - h, cy + h)
+        ]))
+    for vertices in [[(-12, 0), (-8, 0), (-10, 4)], [(2, 0), (8, 1), (5, 6)]]:
+        mixed_map._add_obstacle(Polygon(vertices))
+    mixed_map._add_obstacle(Point(3, 3).buffer(2.7))
+    return mixed_map
+
+
+def reference_lidar(test_map, pos):
+    """Cast the LiDAR rays with Shapely intersections, one ray at a time."""
+    origin = Point(pos[0], pos[1])
+    geoms = [test_map.boundary] + test_map.obstacles
+    points = []
+    for theta in range(0, 360, DELTA_THETA):
+        direction = np.array([math.cos(math.radians(theta)), math.sin(math.radians(theta))])
+        ray = LineString([pos[:2], pos[:2] + R_MAX * direction])
+        hits = [origin.distance(geom.intersection(ray)) for geom in geoms if geom.intersects(ray)]
+        distance = min(hits, default=R_MAX)
+        if R_MIN <= distance <= R_MAX:
+            points.append([*(distance * direction), 0.0])
+    return np.array(points).reshape(-1, 3)
+
+
+def reference_beacons(test_map, pos):
+    """Return the beacons whose line of sight misses the boundary and obstacles."""
+    geoms = [test_map.boundary] + test_map.obstacles
+    visible = []
+    for beacon in test_map.beacons:
+        sight = LineString([pos[:2], (beacon.x, beacon.y)])
+        if not any(geom.intersects(sight) for geom in geoms):
+            visible.append([beacon.x - pos[0], beacon.y - pos[1], 0.0])
+    return np.array(visible).reshape(-1, 3)
+
+
+def sample_poses(test_map, n, seed):
+    """Draw random poses, plus poses inside an obstacle and on the boundary."""
+    rng = np.random.default_rng(seed)
+    x_min, y_min = test_map.boundary_coords[0]
+    x_max, y_max = test_map.boundary_coords[2]
+    poses = [np.array([rng.uniform(x_min, x_max), rng.uniform(y_min, y_max), 0.0])
+             for _ in range(n)]
+    for obstacle in test_map.obstacles:
+        inside = obstacle.representative_point()
+        poses.append(np.array([inside.x, inside.y, 0.0]))
+    poses.append(np.array([x_min, 0.5 * (y_min + y_max), 0.0]))
+    poses.append(np.array([x_max, y_max, 0.0]))
+    return poses
+
+
+@pytest.mark.parametrize('use_numba', numba_backends)
+@pytest.mark.parametrize('map_name', ['MAP', 'mixed'])
+def test_ray_casting_matches_shapely(monkeypatch, use_numba, map_name):
+    monkeypatch.setattr(map_module, 'HAS_NUMBA', use_numba)
+    test_map = map_module.MAP if map_name == 'MAP' else build_mixed_map(Map)
+
+    for pos in sample_poses(test_map, 40, seed=0):
+        expected = reference_lidar(test_map, pos)
+        actual = test_map.calc_lidar_point_cloud(pos, DELTA_THETA, R_MAX, R_MIN)
+        assert actual.shape == expected.shape, pos
+        np.testing.assert_allclose(actual, expected, atol=1e-3, err_msg=str(pos))
+
+        expected = reference_beacons(test_map, pos)
+        actual = test_map.calc_beacon_positions(pos)
+        assert actual.shape == expected.shape, pos
+        np.testing.assert_allclose(actual, expected, atol=1e-3, err_msg=str(pos))